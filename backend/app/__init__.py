@@ -1,11 +1,15 @@
 from flask import Flask
 from flask_cors import CORS
 from flask_compress import Compress
-import os
+from pathlib import Path
 
-from dotenv import load_dotenv
+# Importing Config loads the .env file once for the whole process
+from app.config import Config
+from app.utils.http_cache import clear_response_cache_after_write
+from app.utils.json_utils import HAS_ORJSON
 
-load_dotenv()
+if HAS_ORJSON:
+    from app.json_provider import OrjsonProvider
 
 # Configure logging
 from app.utils.logging_config import setup_logging, get_logger
@@ -13,13 +17,45 @@ setup_logging()
 
 logger = get_logger(__name__)
 
+# Route modules are imported after logging is configured
+from app.routes import documents, query, summarize, health, admin, db_stats
+
+_BLUEPRINTS = (
+    health.bp,
+    documents.bp,
+    query.bp,
+    summarize.bp,
+    admin.bp,
+    db_stats.bp,
+)
+
+# Directories already created by this process, so repeat create_app() calls skip the syscalls
+_ENSURED_DIRS = set()
+
+
+def _ensure_dir(path):
+    """Create a directory (and parents) once per process."""
+    if path not in _ENSURED_DIRS:
+        Path(path).mkdir(parents=True, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
 def create_app():
     app = Flask(__name__)
 
+    # orjson-backed jsonify() when available; Flask's default provider otherwise
+    if HAS_ORJSON:
+        app.json = OrjsonProvider(app)
+
     # Configure app
-    app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', 'uploads')
+    app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
     app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     app.config['ALLOWED_EXTENSIONS'] = {'txt', 'md'}
+    # Prefer zstd (cheapest to produce), then Brotli, then gzip; tiny bodies go as is
+    app.config['COMPRESS_ALGORITHM'] = ['zstd', 'br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 1024
+    # Streamed bodies compress themselves (see app.utils.http_stream)
+    app.config['COMPRESS_STREAMS'] = False
 
     # Enable CORS
     CORS(app)
@@ -28,20 +64,17 @@ def create_app():
     Compress(app)
 
     # Ensure upload directory exists
-    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    _ensure_dir(app.config['UPLOAD_FOLDER'])
 
-    # Ensure data directory exists
-    data_dir = os.getenv('CHROMA_DB_PATH', './data/chroma_db')
-    os.makedirs(os.path.dirname(data_dir), exist_ok=True)
+    # Ensure ChromaDB data directory exists (CHROMA_DB_PATH is the directory itself)
+    _ensure_dir(Config.CHROMA_DB_PATH)
 
     # Register blueprints
-    from app.routes import documents, query, summarize, health, admin, db_stats
-    app.register_blueprint(health.bp)
-    app.register_blueprint(documents.bp)
-    app.register_blueprint(query.bp)
-    app.register_blueprint(summarize.bp)
-    app.register_blueprint(admin.bp)
-    app.register_blueprint(db_stats.bp)
+    for blueprint in _BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+    # Cached GET responses may be stale once anything has been written
+    app.after_request(clear_response_cache_after_write)
 
     logger.info("BigHead application started successfully")
 
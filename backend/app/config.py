@@ -1,7 +1,25 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
-load_dotenv()
+_LOADED = False
+
+
+def load_env():
+    """Load the .env file into the process environment (only once per process)."""
+    global _LOADED
+    if not _LOADED:
+        load_dotenv()
+        _LOADED = True
+
+
+@lru_cache(maxsize=None)
+def get_env(name, default=None):
+    """Cached environment lookup for settings that are read repeatedly."""
+    return os.getenv(name, default)
+
+
+load_env()
 
 class Config:
     OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
@@ -10,8 +28,18 @@ class Config:
     PERPLEXITY_API_KEY = os.getenv('PERPLEXITY_API_KEY')  # For web search
     MODEL_NAME = "openai/gpt-4o-mini"
     EMBEDDING_MODEL = "text-embedding-3-small"
+    # Chunks per embedding API request, and requests sent in parallel while indexing
+    EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '128'))
+    EMBED_CONCURRENCY = int(os.getenv('EMBED_CONCURRENCY', '4'))
     CHROMA_DB_PATH = os.getenv('CHROMA_DB_PATH', './data/chroma_db')
+    # SQLite file caching chunk embeddings across reindexes; empty disables the cache
+    EMBEDDING_CACHE_PATH = os.getenv('EMBEDDING_CACHE_PATH', './data/embedding_cache.db')
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
+    # 'sync' indexes uploads before responding; 'async' saves them, answers 202
+    # and indexes on a background worker (poll GET /api/documents/<filename>/status)
+    INDEX_MODE = os.getenv('INDEX_MODE', 'sync').lower()
+    # Seconds between passes of the worker that deletes RAG chunks left by failed saves
+    RAG_CLEANUP_INTERVAL = float(os.getenv('RAG_CLEANUP_INTERVAL', '30'))
 
     @staticmethod
     def validate():
@@ -2,21 +2,410 @@
 SQLite database service for document ingest data and chat history.
 """
 import sqlite3
-import json
 import uuid
 import threading
 from datetime import datetime
-from typing import List, Dict, Any, Optional, Union
+from typing import List, Dict, Any, Iterator, Optional, Tuple, Union
 from contextlib import contextmanager
+from functools import cache
 import os
 import logging
-import queue
+import collections
 import time
+import atexit
 
+from pathlib import Path
+
+from cachetools import TTLCache
+
+# Time-ordered UUIDs keep new primary keys appended at the end of the id index
+if hasattr(uuid, 'uuid7'):  # Python 3.14+
+    _new_document_id = uuid.uuid7
+else:
+    from uuid6 import uuid7 as _new_document_id
+
+from app.storage import get_document_storage, compute_content_hash, CONTENT_HASH_ALGO
+from app.utils import json_utils
 from app.utils.string_utils import truncate_content
 
+
 logger = logging.getLogger(__name__)
 
+# Per-connection PRAGMAs, applied in a single executescript() round-trip.
+# journal_mode=WAL is persistent in the database file and is set once by SCHEMA_SQL.
+_CONNECTION_PRAGMAS = (
+    'synchronous=NORMAL',           # Balance between safety and performance (safe with WAL)
+    'cache_size=-65536',            # 64MiB page cache (negative value = KiB)
+    'temp_store=MEMORY',            # Store temp tables in memory
+    'mmap_size=268435456',          # 256MB memory-mapped I/O for reads
+    'busy_timeout=5000',            # Wait up to 5s on locks instead of failing immediately
+    'journal_size_limit=67108864',  # Truncate the WAL back to 64MB after checkpoints
+    'wal_autocheckpoint=1000',      # Checkpoint every ~1000 pages (SQLite default, made explicit)
+    'trusted_schema=OFF',           # Don't run schema-defined functions/views with elevated trust
+    'foreign_keys=ON',
+)
+_CONNECTION_PRAGMA_SCRIPT = ''.join(f'PRAGMA {pragma};' for pragma in _CONNECTION_PRAGMAS)
+
+# Pooled connections are handed between worker threads (check_same_thread=False),
+# which is only safe when the sqlite3 module is built serialized (threadsafety == 3).
+if sqlite3.threadsafety != 3:
+    logger.warning(
+        "sqlite3.threadsafety is %d; sharing pooled connections "
+        "between threads may be unsafe with this SQLite build",
+        sqlite3.threadsafety
+    )
+
+# Tables and indexes. Also re-applied by clear_all_data after dropping the tables.
+_SCHEMA_DDL = """
+-- Document ingest data table - optimized to not store content directly
+CREATE TABLE IF NOT EXISTS document_ingest_data (
+    id TEXT PRIMARY KEY,
+    filename TEXT UNIQUE NOT NULL,
+    summary TEXT,
+    content_preview TEXT,  -- First 500 chars for quick preview
+    content TEXT,  -- Keep for backwards compatibility
+    content_hash TEXT,  -- Hash of content for integrity checking
+    content_hash_algo TEXT,  -- Algorithm of content_hash (NULL = legacy md5)
+    file_path TEXT,     -- Reference to file-based storage
+    word_count INTEGER,
+    line_count INTEGER,
+    chunk_count INTEGER,
+    file_size INTEGER,   -- Size of content file in bytes
+    index_status TEXT NOT NULL DEFAULT 'ready',  -- 'indexing' while queued for background RAG indexing, 'failed' if that failed
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Document chat history table
+CREATE TABLE IF NOT EXISTS document_chat_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    document_id TEXT NOT NULL,
+    sender TEXT NOT NULL CHECK(sender IN ('human', 'ai')),
+    message TEXT NOT NULL,
+    sources TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (document_id) REFERENCES document_ingest_data(id) ON DELETE CASCADE
+);
+
+-- Outbox of RAG chunk deletions still owed after a failed document save;
+-- drained by the background RAG cleanup worker
+CREATE TABLE IF NOT EXISTS pending_rag_deletes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    filename TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Optimized indexes
+CREATE INDEX IF NOT EXISTS idx_document_filename ON document_ingest_data(filename);
+-- The document list is ordered newest first with id as tiebreaker, and pages
+-- seek on (updated_at, id) instead of skipping rows with OFFSET
+CREATE INDEX IF NOT EXISTS idx_document_updated_id ON document_ingest_data(updated_at DESC, id DESC);
+-- Chat history is always read per document in time order, which this composite
+-- index serves without a sort step (it also covers document_id-only lookups).
+-- id breaks same-second ties in insertion order; with sender, the index covers
+-- counts and the message summary listing
+CREATE INDEX IF NOT EXISTS idx_chat_doc_created_covering ON document_chat_history(document_id, created_at, id, sender);
+
+-- Superseded chat indexes
+DROP INDEX IF EXISTS idx_chat_document_id;
+DROP INDEX IF EXISTS idx_chat_created_at;
+DROP INDEX IF EXISTS idx_chat_document_created;
+DROP INDEX IF EXISTS idx_document_updated_at;
+
+-- Full-text search. Both are external-content FTS5 tables: they store only the
+-- inverted index and read column values back from the base tables by rowid.
+-- Triggers keep them in sync with every write, including the admin raw edits.
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    filename, summary, content_preview,
+    content='document_ingest_data', content_rowid='rowid',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS chat_fts USING fts5(
+    message,
+    content='document_chat_history', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS documents_fts_insert AFTER INSERT ON document_ingest_data BEGIN
+    INSERT INTO documents_fts(rowid, filename, summary, content_preview)
+    VALUES (new.rowid, new.filename, new.summary, new.content_preview);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_fts_delete AFTER DELETE ON document_ingest_data BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, filename, summary, content_preview)
+    VALUES ('delete', old.rowid, old.filename, old.summary, old.content_preview);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_fts_update AFTER UPDATE OF filename, summary, content_preview ON document_ingest_data BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, filename, summary, content_preview)
+    VALUES ('delete', old.rowid, old.filename, old.summary, old.content_preview);
+    INSERT INTO documents_fts(rowid, filename, summary, content_preview)
+    VALUES (new.rowid, new.filename, new.summary, new.content_preview);
+END;
+
+CREATE TRIGGER IF NOT EXISTS chat_fts_insert AFTER INSERT ON document_chat_history BEGIN
+    INSERT INTO chat_fts(rowid, message) VALUES (new.id, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS chat_fts_delete AFTER DELETE ON document_chat_history BEGIN
+    INSERT INTO chat_fts(chat_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END;
+CREATE TRIGGER IF NOT EXISTS chat_fts_update AFTER UPDATE OF message ON document_chat_history BEGIN
+    INSERT INTO chat_fts(chat_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    INSERT INTO chat_fts(rowid, message) VALUES (new.id, new.message);
+END;
+"""
+
+# Indexes on columns from _ADDED_DOCUMENT_COLUMNS. They can't be in _SCHEMA_DDL,
+# which runs before an unversioned database has had its missing columns added.
+_ADDED_COLUMN_INDEXES = (
+    # Finds an already indexed copy of uploaded content under another filename
+    'CREATE INDEX IF NOT EXISTS idx_document_content_hash ON document_ingest_data(content_hash)',
+)
+
+# Re-derives both search indexes from the base tables, for rows written before
+# the FTS tables existed
+_FTS_REBUILD = (
+    "INSERT INTO documents_fts(documents_fts) VALUES ('rebuild')",
+    "INSERT INTO chat_fts(chat_fts) VALUES ('rebuild')",
+)
+
+# Database schema, applied by _init_db in a single executescript() call.
+# WAL is persistent in the database file and must be set outside a transaction,
+# so it comes first; the tables and indexes are then created in one transaction.
+SCHEMA_SQL = f"""
+PRAGMA journal_mode=WAL;
+BEGIN;
+{_SCHEMA_DDL}
+COMMIT;
+"""
+
+# Schema version stored in PRAGMA user_version; _init_db is a no-op once a
+# database is at this version. Bump it with every schema change; index and table
+# changes in _SCHEMA_DDL are idempotent and need nothing else.
+SCHEMA_VERSION = 7
+
+# Columns added to document_ingest_data after its first release. Databases that
+# predate versioning (user_version 0) are reconciled against this list.
+_ADDED_DOCUMENT_COLUMNS = (
+    ('content_hash', 'TEXT'),
+    ('file_path', 'TEXT'),
+    ('file_size', 'INTEGER'),
+    ('content_preview', 'TEXT'),
+    ('content_hash_algo', 'TEXT'),
+    ('index_status', "TEXT NOT NULL DEFAULT 'ready'"),
+)
+
+# Ordered (version, [sql, ...]) upgrades for versioned databases, applied in one
+# transaction after _SCHEMA_DDL. New columns also go in _SCHEMA_DDL and
+# _ADDED_DOCUMENT_COLUMNS, and indexes on them in _ADDED_COLUMN_INDEXES.
+_MIGRATIONS = (
+    (4, _FTS_REBUILD),
+    (5, ("ALTER TABLE document_ingest_data ADD COLUMN index_status TEXT NOT NULL DEFAULT 'ready'",)),
+    # pending_rag_deletes is created by _SCHEMA_DDL
+    (6, ()),
+    (7, _ADDED_COLUMN_INDEXES),
+)
+
+# Run on the write connection at close(); analysis_limit caps the rows each
+# index scan reads, so shutdown stays fast on large chat histories
+_OPTIMIZE_SQL = "PRAGMA analysis_limit=1000; PRAGMA optimize;"
+
+# Drops and recreates the tables and search indexes in one transaction: cheaper
+# than deleting every row (no per-row WAL writes, and the pages go straight back
+# to the freelist)
+_RESET_SQL = f"""
+BEGIN IMMEDIATE;
+DROP TABLE IF EXISTS document_chat_history;
+DROP TABLE IF EXISTS document_ingest_data;
+DROP TABLE IF EXISTS pending_rag_deletes;
+DROP TABLE IF EXISTS chat_fts;
+DROP TABLE IF EXISTS documents_fts;
+DELETE FROM sqlite_sequence;
+{_SCHEMA_DDL}
+{';'.join(_ADDED_COLUMN_INDEXES)};
+COMMIT;
+"""
+
+def _dumps_sources(sources: List[Dict]) -> str:
+    """Serialize chat sources to a JSON string for the TEXT column."""
+    return json_utils.dumps(sources)
+
+
+_loads_sources = json_utils.loads
+
+# Queries alias a column as "name [SOURCES_JSON]" to have sqlite3 parse it while
+# fetching (connections use PARSE_COLNAMES; declared column types are not used,
+# so TIMESTAMP columns stay strings)
+sqlite3.register_converter('SOURCES_JSON', _loads_sources)
+
+# Document columns returned by the lookup and listing queries. The legacy inline
+# ``content`` column is left out; full content comes from file storage on request.
+_DOCUMENT_COLUMNS = (
+    'id, filename, summary, content_preview, content_hash, content_hash_algo, file_path, '
+    'word_count, line_count, chunk_count, file_size, index_status, created_at, updated_at'
+)
+
+# Rows returned to the document list also carry created_at as uploaded_at, the name the UI reads
+_DOCUMENT_LIST_COLUMNS = _DOCUMENT_COLUMNS + ', created_at AS uploaded_at'
+
+
+def _plain_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """Cursor returning plain tuples, for hot reads that build their own dicts."""
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return cursor
+
+
+def _row_to_dict(cursor: sqlite3.Cursor, row: tuple) -> Dict[str, Any]:
+    """Convert one plain-tuple row to a dict keyed by the cursor's column names."""
+    return dict(zip([d[0] for d in cursor.description], row))
+
+
+def _rows_to_dicts(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """Fetch all remaining plain-tuple rows as dicts, resolving column names once."""
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+# Document lookup cache bounds: entries and seconds an entry may be served
+_DOCUMENT_CACHE_SIZE = 1024
+_DOCUMENT_CACHE_TTL = 60
+
+# INSERT/UPDATE ... RETURNING (SQLite 3.35+) hands back the written row, which primes
+# the document cache without a follow-up SELECT
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query matching all of its words.
+
+    Each word is quoted as a phrase, so punctuation and FTS5 operators typed by
+    the user are matched literally instead of raising a syntax error.
+    """
+    return ' '.join('"' + word.replace('"', '""') + '"' for word in text.split())
+
+
+def _document_cursor(document: Dict[str, Any]) -> Tuple[str, str]:
+    """Keyset cursor for the document list: the sort key of the last row on a page."""
+    return (document['updated_at'], document['id'])
+
+
+# Columns update_document may set, in the order they are bound in _UPDATE_DOCUMENT_SQL.
+# The first group comes straight from the caller; the rest are derived from new content.
+_UPDATABLE_FIELDS = ('filename', 'summary', 'word_count', 'line_count', 'chunk_count', 'index_status')
+_UPDATE_FIELDS = _UPDATABLE_FIELDS + ('content_hash', 'content_hash_algo', 'file_size', 'content_preview')
+
+# One fixed statement for every update, so each connection prepares it once and
+# reuses it from its statement cache. A NULL parameter keeps the current value.
+_UPDATE_DOCUMENT_SQL = (
+    "UPDATE document_ingest_data SET "
+    + ", ".join(f"{key} = COALESCE(?, {key})" for key in _UPDATE_FIELDS)
+    + ", updated_at = CURRENT_TIMESTAMP WHERE id = ?"
+    + (f" RETURNING {_DOCUMENT_COLUMNS}" if _HAS_RETURNING else "")
+)
+
+
+_INSERT_DOCUMENT_SQL = '''
+    INSERT INTO document_ingest_data
+    (id, filename, content_hash, content_hash_algo, file_path, summary, word_count,
+     line_count, chunk_count, file_size, content_preview, index_status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Insert, or update the row that already has this filename (keeping its id,
+# created_at and any summary). Stat columns left NULL by the caller keep their values.
+_UPSERT_DOCUMENT_SQL = _INSERT_DOCUMENT_SQL + '''    ON CONFLICT(filename) DO UPDATE SET
+        content_hash = excluded.content_hash,
+        content_hash_algo = excluded.content_hash_algo,
+        file_path = excluded.file_path,
+        summary = COALESCE(excluded.summary, summary),
+        word_count = COALESCE(excluded.word_count, word_count),
+        line_count = COALESCE(excluded.line_count, line_count),
+        chunk_count = COALESCE(excluded.chunk_count, chunk_count),
+        file_size = excluded.file_size,
+        content_preview = excluded.content_preview,
+        index_status = excluded.index_status,
+        updated_at = CURRENT_TIMESTAMP
+'''
+
+_INSERT_CHAT_MESSAGE_SQL = '''
+    INSERT INTO document_chat_history (document_id, sender, message, sources)
+    VALUES (?, ?, ?, ?)
+'''
+
+# sources is passed as bytes (CAST AS BLOB) to the SOURCES_JSON converter, which
+# sqlite3 runs while fetching each row; NULL stays None
+_CHAT_HISTORY_SQL = '''
+    SELECT id, document_id, sender, message, CAST(sources AS BLOB) AS "sources [SOURCES_JSON]", created_at
+    FROM document_chat_history
+    WHERE document_id = ?
+    ORDER BY created_at ASC, id ASC
+    LIMIT ? OFFSET ?
+'''
+
+# Keyset page: messages after the one with the given id, in the same order
+_CHAT_HISTORY_AFTER_SQL = '''
+    SELECT id, document_id, sender, message, CAST(sources AS BLOB) AS "sources [SOURCES_JSON]", created_at
+    FROM document_chat_history
+    WHERE document_id = ?
+      AND (created_at, id) > (SELECT created_at, id FROM document_chat_history WHERE id = ?)
+    ORDER BY created_at ASC, id ASC
+    LIMIT ?
+'''
+
+# A document row plus its whole chat history as a JSON array, built by SQLite's
+# JSON functions in one statement and parsed by the SOURCES_JSON converter;
+# json() embeds the stored sources unquoted
+_DOCUMENT_WITH_CHAT_SQL = {
+    column: f'''
+    SELECT {_DOCUMENT_COLUMNS}, (
+        SELECT json_group_array(json_object(
+            'id', id, 'document_id', document_id, 'sender', sender, 'message', message,
+            'sources', json(sources), 'created_at', created_at
+        ))
+        FROM (
+            SELECT id, document_id, sender, message, sources, created_at
+            FROM document_chat_history
+            WHERE document_id = d.id
+            ORDER BY created_at ASC, id ASC
+        )
+    ) AS "chat_json [SOURCES_JSON]"
+    FROM document_ingest_data AS d
+    WHERE d.{column} = ?
+'''
+    for column in ('id', 'filename')
+}
+
+# Full-text search queries, ranked by bm25 (FTS5's default rank)
+_SEARCH_DOCUMENTS_SQL = f'''
+    SELECT {', '.join('d.' + column.strip() for column in _DOCUMENT_COLUMNS.split(','))},
+           d.created_at AS uploaded_at,
+           snippet(documents_fts, -1, '[', ']', '...', 12) AS snippet
+    FROM documents_fts
+    JOIN document_ingest_data AS d ON d.rowid = documents_fts.rowid
+    WHERE documents_fts MATCH ?
+    ORDER BY rank
+    LIMIT ?
+'''
+
+_SEARCH_CHAT_SQL = '''
+    SELECT c.id, c.document_id, c.sender, c.message, c.created_at,
+           snippet(chat_fts, 0, '[', ']', '...', 12) AS snippet
+    FROM chat_fts
+    JOIN document_chat_history AS c ON c.id = chat_fts.rowid
+    WHERE chat_fts MATCH ? AND (? IS NULL OR c.document_id = ?)
+    ORDER BY rank
+    LIMIT ?
+'''
+
+# Message metadata only; every column is in idx_chat_doc_created_covering, so the
+# query never reads message bodies or sources from the table
+_CHAT_SUMMARY_SQL = '''
+    SELECT id, sender, created_at
+    FROM document_chat_history
+    WHERE document_id = ?
+    ORDER BY created_at ASC, id ASC
+    LIMIT ? OFFSET ?
+'''
+
 
 class DatabaseService:
     """Service for managing SQLite database operations with simple connection pooling."""
@@ -24,13 +413,42 @@ class DatabaseService:
     def __init__(self, db_path: str = './data/big-head.db'):
         """Initialize database service with simple connection pool."""
         self.db_path = db_path
-        self.pool_size = 3  # Simple fixed pool size
-        self._connection_pool = queue.Queue(maxsize=self.pool_size)
+        # WAL lets readers run in parallel with each other and with the writer, so
+        # reads use a pool of read-only connections and all writes share one
+        # connection serialized by a lock (SQLite allows only one writer anyway)
+        self.pool_size = max(2, os.cpu_count() or 1)
+        # Idle readers; the semaphore counts them, so a successful acquire always
+        # finds one in the deque (whose append/pop are atomic and need no lock)
+        self._idle_readers = collections.deque()
+        self._reader_slots = threading.BoundedSemaphore(self.pool_size)
+        self._write_conn = None
+        self._write_lock = threading.Lock()
+        # Read-only connection reserved for ping(), so health probes never wait
+        # for (or occupy) a pooled reader
+        self._health_conn = None
+        self._health_lock = threading.Lock()
         self._pool_stats = {
             'created': 0,
             'acquired': 0,
-            'returned': 0
+            'returned': 0,
+            'write_acquired': 0
         }
+        # Connections currently held by this thread, reused by nested calls
+        self._local = threading.local()
+        self._closed = False
+
+        # Process-local cache of document rows (without content), keyed by id,
+        # plus a filename -> id index. Every write path invalidates its entries;
+        # the generation counter stops a slow read from re-caching a stale row.
+        # The TTL bounds staleness from writers outside this process (scripts
+        # such as clear_databases.py, or a second server process).
+        self._doc_cache = TTLCache(maxsize=_DOCUMENT_CACHE_SIZE, ttl=_DOCUMENT_CACHE_TTL)
+        self._name_cache = TTLCache(maxsize=_DOCUMENT_CACHE_SIZE, ttl=_DOCUMENT_CACHE_TTL)
+        self._cache_lock = threading.Lock()
+        self._cache_generation = 0
+
+        # File storage holding document content (resolved once, not per call)
+        self._storage = get_document_storage()
 
         # Ensure the data directory exists
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -38,202 +456,318 @@ class DatabaseService:
         # Initialize database schema
         self._init_db()
         self._initialize_connection_pool()
+        atexit.register(self.close)
         
-        logger.debug(f"Database service initialized with pool_size={self.pool_size}")
+        logger.debug("Database service initialized with pool_size=%s", self.pool_size)
+
+    def _create_connection(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a new connection with the per-connection PRAGMAs applied."""
+        if read_only:
+            # mode=ro opens the file read-only; query_only also rejects writes in SQL
+            database, uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro", True
+        else:
+            database, uri = self.db_path, False
+        conn = sqlite3.connect(
+            database,
+            uri=uri,
+            check_same_thread=False,  # Allow sharing between threads
+            timeout=10.0,  # Shorter timeout for small deployment
+            isolation_level=None,  # Autocommit mode for better performance
+            cached_statements=256,  # Keep prepared statements for the fixed query set
+            detect_types=sqlite3.PARSE_COLNAMES  # Converters named in column aliases only
+        )
+        conn.row_factory = sqlite3.Row
+        conn.executescript(_CONNECTION_PRAGMA_SCRIPT)
+        if read_only:
+            conn.execute('PRAGMA query_only=1')
+        else:
+            # The FTS sync triggers write to FTS5 tables, which SQLite only allows
+            # from schema code on connections that trust the schema
+            conn.execute('PRAGMA trusted_schema=ON')
+        return conn
 
     def _initialize_connection_pool(self):
-        """Initialize the connection pool with optimized connections."""
-        # Create connections for the pool
+        """Open the write connection and fill the read-only connection pool."""
+        self._write_conn = self._create_connection()
+        self._pool_stats['created'] += 1
+
+        try:
+            self._health_conn = self._create_connection(read_only=True)
+        except Exception as e:
+            logger.warning("Failed to create health check connection, ping() will use the read pool: %s", e)
+
+        # Create connections for the read pool
+        last_error = None
         for i in range(self.pool_size):
             try:
-                conn = sqlite3.connect(
-                    self.db_path,
-                    check_same_thread=False,  # Allow sharing between threads
-                    timeout=10.0,  # Shorter timeout for small deployment
-                    isolation_level=None  # Autocommit mode for better performance
-                )
-                conn.row_factory = sqlite3.Row
-                
-                # Essential performance optimizations
-                cursor = conn.cursor()
-                cursor.execute('PRAGMA journal_mode=WAL')  # Write-Ahead Logging for better concurrency
-                cursor.execute('PRAGMA synchronous=NORMAL')  # Balance between safety and performance
-                cursor.execute('PRAGMA cache_size=5000')  # 5MB cache (reduced)
-                cursor.execute('PRAGMA temp_store=MEMORY')  # Store temp tables in memory
-                cursor.execute('PRAGMA foreign_keys=ON')
-                cursor.execute('PRAGMA optimize')
+                conn = self._create_connection(read_only=True)
                 
-                self._connection_pool.put(conn)
+                self._idle_readers.append(conn)
                 self._pool_stats['created'] += 1
                 
             except Exception as e:
-                logger.error(f"Failed to create connection {i+1}/{self.pool_size}: {str(e)}")
+                logger.error("Failed to create read connection %s/%s: %s", i+1, self.pool_size, e)
+                last_error = e
                 # Continue with other connections
         
-        actual_pool_size = self._connection_pool.qsize()
-        logger.debug(f"Database connection pool initialized with {actual_pool_size} connections")
+        actual_pool_size = len(self._idle_readers)
+        if actual_pool_size == 0:
+            # An empty pool would fail every read later as "pool exhausted", hiding the cause
+            self._write_conn.close()
+            if self._health_conn is not None:
+                self._health_conn.close()
+            raise Exception(f"Failed to open any read connection to {self.db_path}: {last_error}") from last_error
+        # One slot per reader that actually opened
+        self._reader_slots = threading.BoundedSemaphore(actual_pool_size)
+        logger.debug("Database connection pool initialized with 1 writer and %s readers", actual_pool_size)
     
     def get_pool_stats(self) -> dict:
         """Get connection pool statistics."""
-        current_pool_size = self._connection_pool.qsize()
+        current_pool_size = len(self._idle_readers)
         return {
             'pool_size': self.pool_size,
             'current_pool_size': current_pool_size,
-            'connections_in_use': self._pool_stats['created'] - current_pool_size,
+            # The writer is counted in total_created but is not part of the read pool
+            'connections_in_use': self._pool_stats['created'] - 1 - current_pool_size,
+            'writer_in_use': self._write_lock.locked(),
             'total_created': self._pool_stats['created'],
             'total_acquired': self._pool_stats['acquired'],
-            'total_returned': self._pool_stats['returned']
+            'total_returned': self._pool_stats['returned'],
+            'total_write_acquired': self._pool_stats['write_acquired']
         }
     
+    def ping(self) -> bool:
+        """Run SELECT 1 on the dedicated health connection; True if it answered."""
+        if self._health_conn is None:
+            with self._get_read_conn() as conn:
+                return conn.execute('SELECT 1').fetchone()[0] == 1
+        with self._health_lock:
+            return self._health_conn.execute('SELECT 1').fetchone()[0] == 1
+
     @contextmanager
-    def _get_connection(self):
-        """Context manager for database connections from pool."""
-        conn = None
-        
-        try:
-            # Get connection from pool
-            conn = self._connection_pool.get(timeout=2.0)
-            self._pool_stats['acquired'] += 1
-            
+    def _get_read_conn(self):
+        """Context manager for a read-only connection from the read pool.
+
+        Inside a write block the thread's write connection is used, so reads see
+        its own uncommitted changes; nested reads reuse the reader already held.
+        """
+        conn = getattr(self._local, 'write_conn', None) or getattr(self._local, 'read_conn', None)
+        if conn is not None:
             yield conn
-            
-        except queue.Empty:
+            return
+
+        # Get connection from pool
+        if not self._reader_slots.acquire(timeout=2.0):
             logger.error("Database connection pool exhausted")
             raise Exception("Database connection pool exhausted")
+        conn = self._idle_readers.pop()
+
+        self._pool_stats['acquired'] += 1
+        self._local.read_conn = conn
+
+        try:
+            yield conn
         except Exception as e:
-            logger.error(f"Database operation failed: {str(e)}")
+            logger.error("Database operation failed: %s", e)
             raise
         finally:
-            if conn:
-                try:
-                    # Return connection to pool
-                    self._connection_pool.put(conn, timeout=0.5)
-                    self._pool_stats['returned'] += 1
-                except queue.Full:
-                    # Pool is full, close this connection
-                    conn.close()
-                except Exception as e:
-                    logger.error(f"Error returning connection to pool: {str(e)}")
-                    conn.close()
-    
-    
+            self._local.read_conn = None
+            if conn.in_transaction:
+                # Never hand a connection with an open transaction back to the pool
+                conn.rollback()
+            # Return connection to pool
+            self._idle_readers.append(conn)
+            self._pool_stats['returned'] += 1
+            self._reader_slots.release()
+
+    @contextmanager
+    def _get_write_conn(self):
+        """Context manager for the single write connection.
+
+        Holds the write lock for the duration of the block; nested calls on the
+        same thread reuse the connection without re-acquiring the lock.
+        """
+        conn = getattr(self._local, 'write_conn', None)
+        if conn is not None:
+            yield conn
+            return
+
+        if not self._write_lock.acquire(timeout=10.0):
+            logger.error("Timed out waiting for the database write connection")
+            raise Exception("Database write connection busy")
+
+        conn = self._write_conn
+        self._pool_stats['write_acquired'] += 1
+        self._local.write_conn = conn
+
+        try:
+            yield conn
+        except Exception as e:
+            logger.error("Database operation failed: %s", e)
+            raise
+        finally:
+            self._local.write_conn = None
+            if conn.in_transaction:
+                # Never leave a transaction open on the shared writer
+                conn.rollback()
+            self._write_lock.release()
+
+    # Public accessors for routes that run their own SQL: read_conn() borrows a pooled
+    # read-only connection, write_conn() the shared writer
+    read_conn = _get_read_conn
+    write_conn = _get_write_conn
+
+    # Raw SQL callers (admin routes) may write, so the generic accessor is the writer
+    _get_connection = _get_write_conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run several statements atomically on the write connection.
+
+        Connections are in autocommit mode, so multi-statement writes open an
+        explicit transaction. BEGIN IMMEDIATE takes the write lock up front, so
+        a busy database is waited on (busy_timeout) at the start instead of
+        failing on a lock upgrade mid-transaction. Nested use joins the outer
+        transaction.
+        """
+        with self._get_write_conn() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield conn
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
+
+    def close(self):
+        """Close the write connection and idle readers. Registered to run at interpreter exit."""
+        if self._closed:
+            return
+        self._closed = True
+
+        closed = 0
+        while True:
+            try:
+                conn = self._idle_readers.pop()
+            except IndexError:
+                break
+            try:
+                conn.close()
+                closed += 1
+            except Exception as e:
+                logger.error("Error closing pooled connection: %s", e)
+
+        if self._health_conn is not None:
+            try:
+                self._health_conn.close()
+                closed += 1
+            except Exception as e:
+                logger.error("Error closing health check connection: %s", e)
+
+        if self._write_conn is not None:
+            try:
+                # Bounded statistics refresh, as recommended for long-lived connections
+                self._write_conn.executescript(_OPTIMIZE_SQL)
+            except sqlite3.Error as e:
+                logger.warning("PRAGMA optimize failed on close: %s", e)
+            try:
+                self._write_conn.close()
+                closed += 1
+            except Exception as e:
+                logger.error("Error closing write connection: %s", e)
+
+        logger.debug("Database service closed %s connections", closed)
 
     def _init_db(self):
-        """Create database tables if they don't exist."""
+        """Create or upgrade the schema, tracked with PRAGMA user_version."""
         # Create a direct connection for initialization since pool isn't ready yet
-        conn = sqlite3.connect(
-            self.db_path,
-            check_same_thread=False,
-            timeout=10.0,
-            isolation_level=None
-        )
-        conn.row_factory = sqlite3.Row
-        
-        # Apply optimizations
+        conn = self._create_connection()
         cursor = conn.cursor()
-        cursor.execute('PRAGMA journal_mode=WAL')
-        cursor.execute('PRAGMA synchronous=NORMAL')
-        cursor.execute('PRAGMA foreign_keys=ON')
 
-        # Document ingest data table - optimized to not store content directly
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS document_ingest_data (
-                    id TEXT PRIMARY KEY,
-                    filename TEXT UNIQUE NOT NULL,
-                    summary TEXT,
-                    content_preview TEXT,  -- First 500 chars for quick preview
-                    content TEXT,  -- Keep for backwards compatibility
-                    content_hash TEXT,  -- Hash of content for integrity checking
-                    file_path TEXT,     -- Reference to file-based storage
-                    word_count INTEGER,
-                    line_count INTEGER,
-                    chunk_count INTEGER,
-                    file_size INTEGER,   -- Size of content file in bytes
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
 
-        # Check if we need to upgrade the schema by adding missing columns
-        cursor.execute("PRAGMA table_info(document_ingest_data)")
-        columns = {row[1] for row in cursor.fetchall()}
-        
-        # Add missing columns if they don't exist
-        if 'content_hash' not in columns:
-            cursor.execute('ALTER TABLE document_ingest_data ADD COLUMN content_hash TEXT')
-            logger.info("Added missing content_hash column to document_ingest_data table")
-            
-        if 'file_path' not in columns:
-            cursor.execute('ALTER TABLE document_ingest_data ADD COLUMN file_path TEXT')
-            logger.info("Added missing file_path column to document_ingest_data table")
-            
-        if 'file_size' not in columns:
-            cursor.execute('ALTER TABLE document_ingest_data ADD COLUMN file_size INTEGER')
-            logger.info("Added missing file_size column to document_ingest_data table")
-            
-        if 'content_preview' not in columns:
-            cursor.execute('ALTER TABLE document_ingest_data ADD COLUMN content_preview TEXT')
-            logger.info("Added missing content_preview column to document_ingest_data table")
+        if version < SCHEMA_VERSION:
+            # Tables and indexes are created in one parse and one commit
+            conn.executescript(SCHEMA_SQL)
 
-        # Document chat history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS document_chat_history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    document_id TEXT NOT NULL,
-                    sender TEXT NOT NULL CHECK(sender IN ('human', 'ai')),
-                    message TEXT NOT NULL,
-                    sources TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (document_id) REFERENCES document_ingest_data(id) ON DELETE CASCADE
-                )
-            ''')
+            cursor.execute('BEGIN IMMEDIATE')
+            if version == 0:
+                # Unversioned database: either just created from the current schema,
+                # or created by an older release, whose missing columns are added here
+                self._add_missing_columns(cursor)
+                for statement in _ADDED_COLUMN_INDEXES:
+                    cursor.execute(statement)
+                self._migrate_inline_content(cursor)
+                for statement in _FTS_REBUILD:
+                    cursor.execute(statement)
+            else:
+                for target_version, statements in _MIGRATIONS:
+                    if version < target_version:
+                        for statement in statements:
+                            cursor.execute(statement)
+            cursor.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            cursor.execute('COMMIT')
 
-        # Create optimized indexes
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_document_filename
-            ON document_ingest_data(filename)
-        ''')
+            # Planner statistics only need a full rebuild when the schema changed;
+            # PRAGMA optimize at close() keeps them current otherwise
+            cursor.execute('ANALYZE')
 
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_document_updated_at
-            ON document_ingest_data(updated_at DESC)
-        ''')
+            logger.info("Database schema upgraded from version %d to %d", version, SCHEMA_VERSION)
+        
+        logger.info("Database schema initialized with optimized indexes")
+        
+        conn.close()
 
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_chat_document_id
-            ON document_chat_history(document_id)
-        ''')
+    def _add_missing_columns(self, cursor: sqlite3.Cursor):
+        """Add columns introduced after document_ingest_data was first created."""
+        cursor.execute("PRAGMA table_info(document_ingest_data)")
+        columns = {row[1] for row in cursor.fetchall()}
+        
+        for column, column_type in _ADDED_DOCUMENT_COLUMNS:
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE document_ingest_data ADD COLUMN {column} {column_type}')
+                logger.info("Added missing %s column to document_ingest_data table", column)
 
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_chat_created_at
-            ON document_chat_history(created_at)
-        ''')
+    def _migrate_inline_content(self, cursor: sqlite3.Cursor):
+        """Move legacy inline ``content`` into file storage and clear the column.
 
+        Keeping content out of the metadata rows keeps scans over
+        document_ingest_data small; rows from before file storage are moved once here.
+        """
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_chat_document_created 
-            ON document_chat_history(document_id, created_at)
+            SELECT id, filename, content, file_path FROM document_ingest_data
+            WHERE content IS NOT NULL
         ''')
+        rows = cursor.fetchall()
+        if not rows:
+            return
 
-        cursor.execute('''
-            ANALYZE
-        ''')
-        
-        logger.info("Database schema initialized with optimized indexes")
-        
-        conn.close()
+        migrated = 0
+        for row in rows:
+            if not row['file_path']:
+                if not self._storage.store_document(row['filename'], row['content'], {}):
+                    logger.error("Failed to move inline content of %s to file storage", row['filename'])
+                    continue
+                stored_metadata = self._storage.load_metadata(row['filename']) or {}
+                cursor.execute(
+                    'UPDATE document_ingest_data SET file_path = ?, file_size = ?, content = NULL WHERE id = ?',
+                    (stored_metadata.get('file_path'), stored_metadata.get('file_size'), row['id'])
+                )
+            else:
+                cursor.execute('UPDATE document_ingest_data SET content = NULL WHERE id = ?', (row['id'],))
+            migrated += 1
+
+        logger.info("Moved inline content of %d documents out of document_ingest_data", migrated)
 
     # ==================== Document Operations ====================
 
-    def create_document(self, filename: str, content: str, metadata: Dict[str, Any]) -> str:
-        """Create a new document record using file storage and return the document ID."""
-        import hashlib
-        document_id = str(uuid.uuid4())
-        content_hash = hashlib.md5(content.encode()).hexdigest()
-        
-        # Store content in file storage
-        from ..storage import get_document_storage
-        storage = get_document_storage()
-        
+    def _store_new_document(self, document_id: str, filename: str, content: str, metadata: Dict[str, Any]) -> tuple:
+        """Write a new document to file storage and return its INSERT parameters."""
         # Prepare storage metadata
         storage_metadata = {
             'word_count': metadata.get('word_count'),
@@ -243,197 +777,433 @@ class DatabaseService:
         }
         
         # Store document in file system
-        if not storage.store_document(filename, content, storage_metadata):
+        if not self._storage.store_document(filename, content, storage_metadata):
             raise Exception(f"Failed to store document {filename} in file storage")
         
         # Get stored metadata
-        stored_metadata = storage.load_metadata(filename)
+        stored_metadata = self._storage.load_metadata(filename)
         if not stored_metadata:
             raise Exception(f"Failed to retrieve stored metadata for {filename}")
         
         # Generate content preview
         content_preview = truncate_content(content, max_length=500)
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO document_ingest_data
-                (id, filename, content_hash, file_path, summary, word_count, line_count, 
-                 chunk_count, file_size, content_preview)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                document_id,
-                filename,
-                content_hash,
-                stored_metadata['file_path'],
-                metadata.get('summary'),
-                metadata.get('word_count'),
-                metadata.get('line_count'),
-                metadata.get('chunk_count'),
-                stored_metadata['file_size'],
-                content_preview
-            ))
+        # The storage layer hashes the encoded content once; reuse its result
+        return (
+            document_id,
+            filename,
+            stored_metadata['content_hash'],
+            stored_metadata['content_hash_algo'],
+            stored_metadata['file_path'],
+            metadata.get('summary'),
+            metadata.get('word_count'),
+            metadata.get('line_count'),
+            metadata.get('chunk_count'),
+            stored_metadata['file_size'],
+            content_preview,
+            metadata.get('index_status') or 'ready'
+        )
+
+    def create_document(self, filename: str, content: str, metadata: Dict[str, Any]) -> str:
+        """Create a new document record using file storage and return the document ID."""
+        document_id = str(_new_document_id())
+        params = self._store_new_document(document_id, filename, content, metadata)
+        
+        query = _INSERT_DOCUMENT_SQL
+        if _HAS_RETURNING:
+            query += f'RETURNING {_DOCUMENT_COLUMNS}'
+        
+        with self._get_write_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute(query, params)
+            # Drain the statement so the autocommit INSERT completes
+            rows = cursor.fetchall() if _HAS_RETURNING else None
             
-            logger.debug(f"Created document record: {filename} (ID: {document_id})")
-            return document_id
+            logger.debug("Created document record: %s (ID: %s)", filename, document_id)
+        
+        if rows:
+            self._prime_document(_row_to_dict(cursor, rows[0]))
+        else:
+            self._invalidate_document(document_id, filename)
+        return document_id
+
+    def upsert_document(self, filename: str, content: str, metadata: Dict[str, Any]) -> Tuple[str, bool]:
+        """Create the document, or update the one with this filename, in a single statement.
+
+        Replaces a lookup followed by create_document or update_document, so
+        there is no window in which another upload of the same name slips in
+        between the check and the write.
+
+        Returns:
+            Tuple of (document_id, is_new)
+        """
+        document_id = str(_new_document_id())
+        params = self._store_new_document(document_id, filename, content, metadata)
+
+        with self._get_write_conn() as conn:
+            cursor = _plain_cursor(conn)
+            if _HAS_RETURNING:
+                cursor.execute(_UPSERT_DOCUMENT_SQL + f'RETURNING {_DOCUMENT_COLUMNS}', params)
+            else:
+                cursor.execute(_UPSERT_DOCUMENT_SQL, params)
+                cursor.execute(f'SELECT {_DOCUMENT_COLUMNS} FROM document_ingest_data WHERE filename = ?',
+                               (filename,))
+            document = _row_to_dict(cursor, cursor.fetchone())
+            # Drain the statement so the autocommit upsert completes
+            cursor.fetchall()
+
+        # A conflict keeps the stored id, so the id we generated tells whether a row was inserted
+        is_new = document['id'] == document_id
+        logger.debug("%s document record: %s (ID: %s)", 'Created' if is_new else 'Updated', filename, document['id'])
+        self._prime_document(document)
+        return document['id'], is_new
+
+    def bulk_create_documents(self, records: List[Tuple[str, str, Dict[str, Any]]]) -> List[str]:
+        """Create several document records with one prepared INSERT in a single transaction.
+
+        Args:
+            records: ``(filename, content, metadata)`` tuples, as for ``create_document``
+
+        Returns:
+            The new document IDs, in the order given
+        """
+        if not records:
+            return []
+        
+        # File storage comes first, as in create_document; only the rows share a transaction
+        rows = [
+            self._store_new_document(str(_new_document_id()), filename, content, metadata)
+            for filename, content, metadata in records
+        ]
+        
+        with self._transaction() as conn:
+            conn.executemany(_INSERT_DOCUMENT_SQL, rows)
+        
+        for row in rows:
+            self._invalidate_document(row[0], row[1])
+        logger.debug("Created %d document records in one transaction", len(rows))
+        return [row[0] for row in rows]
+
+    def bulk_save_documents(self, records: List[Tuple[str, str, Dict[str, Any]]],
+                            updates: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Create new documents and update existing ones in a single transaction.
+
+        File storage is written outside the transaction, so if any write fails
+        the new documents' files are deleted and the updated ones are put back
+        as they were before the rows are rolled back: the batch is saved whole or
+        not at all.
+
+        Args:
+            records: ``(filename, content, metadata)`` tuples, as for ``bulk_create_documents``
+            updates: ``(document_id, updates)`` pairs, as for ``update_document``
+
+        Returns:
+            The new document IDs, in the order given
+
+        Raises:
+            Exception: If any document could not be saved
+        """
+        # What each update overwrites in file storage: (filename, content, metadata)
+        overwritten = []
+        try:
+            with self._transaction():
+                document_ids = self.bulk_create_documents(records)
+                for document_id, changes in updates:
+                    document = self.get_document_by_id(document_id)
+                    if document:
+                        filename = document['filename']
+                        overwritten.append((filename, self._load_content(filename),
+                                            self._storage.load_metadata(filename)))
+                    if not document or not self.update_document(document_id, changes):
+                        raise Exception(f"Failed to update document {document_id}")
+        except Exception:
+            for filename, _, _ in records:
+                self._storage.delete_document(filename)
+            for filename, content, metadata in overwritten:
+                if content is not None:
+                    self._storage.store_document(filename, content, metadata)
+            # update_document may have cached rows that were then rolled back
+            self.clear_document_cache()
+            raise
+
+        logger.debug("Saved %d new and %d updated documents in one transaction", len(records), len(updates))
+        return document_ids
 
     def update_document(self, document_id: str, updates: Dict[str, Any]) -> bool:
         """Update existing document record by ID with file storage support."""
-        import hashlib
-        from ..storage import get_document_storage
-        
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        with self._get_write_conn() as conn:
+            cursor = _plain_cursor(conn)
             
             # Get current document info
-            cursor.execute('SELECT filename, content_hash FROM document_ingest_data WHERE id = ?', (document_id,))
+            cursor.execute(
+                'SELECT filename, content_hash, content_hash_algo FROM document_ingest_data WHERE id = ?',
+                (document_id,)
+            )
             current = cursor.fetchone()
             if not current:
                 return False
                 
-            current_filename = current['filename']
+            current_filename, current_hash, current_hash_algo = current
             new_filename = updates.get('filename', current_filename)
             
             # Update file storage if content is provided
-            storage = get_document_storage()
-            new_content_hash = None
-            file_size = None
+            stored_metadata = None
             content_preview = None
+            content = updates.get('content')
+            
+            if (content is not None and new_filename == current_filename and current_hash
+                    and current_hash_algo == CONTENT_HASH_ALGO
+                    and compute_content_hash(content.encode('utf-8')) == current_hash):
+                # Same bytes as the stored file: skip the rewrite and the derived columns
+                logger.debug("Content unchanged for %s, skipping storage rewrite", current_filename)
+                content = None
             
-            if 'content' in updates:
-                content = updates['content']
-                new_content_hash = hashlib.md5(content.encode()).hexdigest()
+            if content is not None:
                 
                 # Update file storage
-                if not storage.update_document(new_filename, content, {
+                if not self._storage.update_document(new_filename, content, {
                     'word_count': updates.get('word_count'),
                     'line_count': updates.get('line_count'),
                     'chunk_count': updates.get('chunk_count'),
                     'summary': updates.get('summary')
                 }):
-                    logger.error(f"Failed to update document {new_filename} in file storage")
+                    logger.error("Failed to update document %s in file storage", new_filename)
                     return False
                 
                 # Get updated metadata
-                stored_metadata = storage.load_metadata(new_filename)
+                stored_metadata = self._storage.load_metadata(new_filename)
                 if stored_metadata:
-                    file_size = stored_metadata['file_size']
                     content_preview = truncate_content(content, max_length=500)
                 
                 # If filename changed, clean up old file
                 if new_filename != current_filename:
-                    storage.delete_document(current_filename)
+                    self._storage.delete_document(current_filename)
 
-            # Build dynamic UPDATE query based on provided fields
-            fields = []
-            values = []
+            # Collect the columns to update; derived file fields only when content changed.
+            # None leaves a column unchanged, matching the COALESCE in the statement
+            values = {key: updates[key] for key in _UPDATABLE_FIELDS if updates.get(key) is not None}
+            if stored_metadata:
+                values['content_hash'] = stored_metadata['content_hash']
+                values['content_hash_algo'] = stored_metadata.get('content_hash_algo')
+                values['file_size'] = stored_metadata['file_size']
+            if content_preview is not None:
+                values['content_preview'] = content_preview
 
-            for key in ['filename', 'summary', 'word_count', 'line_count', 'chunk_count']:
-                if key in updates:
-                    fields.append(f"{key} = ?")
-                    values.append(updates[key])
+            if not values:
+                # Nothing to write; an unchanged-content update still succeeded
+                return 'content' in updates
+
+            params = [values.get(key) for key in _UPDATE_FIELDS]
+            params.append(document_id)
+            cursor.execute(_UPDATE_DOCUMENT_SQL, params)
+            if _HAS_RETURNING:
+                rows = cursor.fetchall()
+                updated = bool(rows)
+                if updated:
+                    self._prime_document(_row_to_dict(cursor, rows[0]), current_filename)
+            else:
+                updated = cursor.rowcount > 0
+                self._invalidate_document(document_id, current_filename, new_filename)
             
-            # Add file-related fields if content was updated
-            if new_content_hash is not None:
-                fields.append("content_hash = ?")
-                values.append(new_content_hash)
-                
-            if file_size is not None:
-                fields.append("file_size = ?")
-                values.append(file_size)
-                
-            if content_preview is not None:
-                fields.append("content_preview = ?")
-                values.append(content_preview)
+            logger.debug("Updated document record: %s (ID: %s)", new_filename, document_id)
+            return updated
 
-            if not fields:
+    def touch_document(self, document_id: str) -> bool:
+        """Bump a document's ``updated_at`` without changing anything else."""
+        with self._get_write_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute('SELECT filename FROM document_ingest_data WHERE id = ?', (document_id,))
+            row = cursor.fetchone()
+            if not row:
                 return False
+            cursor.execute('UPDATE document_ingest_data SET updated_at = CURRENT_TIMESTAMP WHERE id = ?',
+                           (document_id,))
+        self._invalidate_document(document_id, row[0])
+        return True
 
-            # Always update updated_at
-            fields.append("updated_at = CURRENT_TIMESTAMP")
-            values.append(document_id)
+    def _fetch_document(self, cursor: sqlite3.Cursor, column: str, value: str) -> Optional[Dict[str, Any]]:
+        """Fetch one document row by ``id`` or ``filename`` on an existing cursor."""
+        cursor.execute(f'SELECT {_DOCUMENT_COLUMNS} FROM document_ingest_data WHERE {column} = ?', (value,))
+        row = cursor.fetchone()
+        return _row_to_dict(cursor, row) if row else None
 
-            query = f"UPDATE document_ingest_data SET {', '.join(fields)} WHERE id = ?"
-            cursor.execute(query, values)
-            
-            logger.debug(f"Updated document record: {new_filename} (ID: {document_id})")
-            return cursor.rowcount > 0
+    def _attach_content(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a document's full content from file storage into ``document['content']``."""
+        content = self._load_content(document['filename'])
+        document['content'] = content if content is not None else ''
+        return document
+
+    def _load_content(self, filename: str) -> Optional[str]:
+        """Read a document's content from file storage, logging when it is missing."""
+        content = self._storage.load_document(filename)
+        if content is None:
+            logger.warning("Content not found in file storage for: %s", filename)
+        return content
+
+    def get_document_content(self, document_id: str) -> Optional[str]:
+        """Get only the full content of a document, or None if the document doesn't exist.
+
+        Content lives in file storage; the legacy inline ``content`` column is only
+        read for rows created before file storage existed.
+        """
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute('SELECT filename, file_path, content FROM document_ingest_data WHERE id = ?', (document_id,))
+            row = cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        filename, file_path, legacy_content = row
+        if not file_path and legacy_content is not None:
+            return legacy_content
+        
+        content = self._load_content(filename)
+        return content if content is not None else ''
+
+    def _find_document(self, column: str, value: str, cursor: Optional[sqlite3.Cursor] = None) -> Optional[Dict[str, Any]]:
+        """Look a document up by ``id`` or ``filename``, serving repeat lookups from the cache.
+
+        Returns a fresh dict the caller may modify. ``cursor`` lets callers that
+        already hold a connection run the lookup on it.
+        """
+        with self._cache_lock:
+            document_id = self._name_cache.get(value) if column == 'filename' else value
+            cached = self._doc_cache.get(document_id) if document_id is not None else None
+            generation = self._cache_generation
+        if cached is not None:
+            return dict(cached)
+
+        if cursor is not None:
+            document = self._fetch_document(cursor, column, value)
+        else:
+            with self._get_read_conn() as conn:
+                document = self._fetch_document(_plain_cursor(conn), column, value)
+
+        if document:
+            self._cache_document(document, generation)
+        return document
+
+    def _cache_document(self, document: Dict[str, Any], generation: int):
+        """Cache a row read by a lookup, unless a write happened since ``generation``."""
+        with self._cache_lock:
+            if generation == self._cache_generation:
+                self._doc_cache[document['id']] = dict(document)
+                self._name_cache[document['filename']] = document['id']
+
+    def _invalidate_document(self, document_id: Optional[str] = None, *filenames: str):
+        """Drop cached entries for a document after it was written."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            if document_id is not None:
+                self._doc_cache.pop(document_id, None)
+            for filename in filenames:
+                self._name_cache.pop(filename, None)
+
+    def _prime_document(self, document: Dict[str, Any], *stale_filenames: str):
+        """Cache a row just written by this service, replacing any older entry."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            for filename in stale_filenames:
+                self._name_cache.pop(filename, None)
+            self._doc_cache[document['id']] = dict(document)
+            self._name_cache[document['filename']] = document['id']
+
+    def clear_document_cache(self):
+        """Drop all cached documents, e.g. after writes made outside this service."""
+        with self._cache_lock:
+            self._cache_generation += 1
+            self._doc_cache.clear()
+            self._name_cache.clear()
 
     def get_document_by_id(self, document_id: str, include_content: bool = False) -> Optional[Dict[str, Any]]:
         """Get document by ID, optionally including full content from file storage."""
-        from ..storage import get_document_storage
+        document = self._find_document('id', document_id)
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM document_ingest_data WHERE id = ?', (document_id,))
-            row = cursor.fetchone()
-            
-            if not row:
-                return None
-            
-            document = dict(row)
-            
-            # Load content from file storage if requested
-            if include_content:
-                storage = get_document_storage()
-                content = storage.load_document(document['filename'])
-                if content is not None:
-                    document['content'] = content
-                else:
-                    logger.warning(f"Content not found in file storage for: {document['filename']}")
-                    document['content'] = ''
-            
-            return document
+        # Load content from file storage if requested
+        if document and include_content:
+            self._attach_content(document)
+        
+        return document
 
     def get_document_by_filename(self, filename: str, include_content: bool = False) -> Optional[Dict[str, Any]]:
         """Get document by filename, optionally including full content from file storage."""
-        from ..storage import get_document_storage
+        document = self._find_document('filename', filename)
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT * FROM document_ingest_data WHERE filename = ?', (filename,))
+        # Load content from file storage if requested
+        if document and include_content:
+            self._attach_content(document)
+        
+        return document
+
+    def get_document_by_content_hash(self, content_hash: str, algo: str = CONTENT_HASH_ALGO) -> Optional[Dict[str, Any]]:
+        """Find a fully indexed document whose stored content has this hash, if any."""
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute(
+                f'SELECT {_DOCUMENT_COLUMNS} FROM document_ingest_data '
+                "WHERE content_hash = ? AND content_hash_algo = ? AND index_status = 'ready' LIMIT 1",
+                (content_hash, algo)
+            )
             row = cursor.fetchone()
-            
-            if not row:
-                return None
-            
-            document = dict(row)
-            
-            # Load content from file storage if requested
-            if include_content:
-                storage = get_document_storage()
-                content = storage.load_document(filename)
-                if content is not None:
-                    document['content'] = content
-                else:
-                    logger.warning(f"Content not found in file storage for: {filename}")
-                    document['content'] = ''
-            
-            return document
+            return _row_to_dict(cursor, row) if row else None
+
+    def get_all_documents(self, page: int = 1, per_page: int = 50,
+                          after: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """Get all documents with pagination, newest first.
+
+        Args:
+            page: 1-based page number (OFFSET pagination, used when ``after`` is None)
+            per_page: Documents per page (1-100)
+            after: ``next_cursor`` from a previous page, as ``(updated_at, id)``; seeks
+                straight to the following page instead of skipping ``page`` rows
 
-    def get_all_documents(self, page: int = 1, per_page: int = 50) -> Dict[str, Any]:
-        """Get all documents with pagination."""
+        Returns:
+            Dict with ``documents`` and ``pagination``. ``pagination['next_cursor']``
+            is None on the last page.
+        """
         # Validate pagination parameters
         if page < 1:
             page = 1
         if per_page < 1 or per_page > 100:
             per_page = 50
-            
-        offset = (page - 1) * per_page
         
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
             
             # Get total count
             cursor.execute('SELECT COUNT(*) as total FROM document_ingest_data')
-            total = cursor.fetchone()['total']
+            total = cursor.fetchone()[0]
             
+            if after is not None:
+                # Keyset page on idx_document_updated_id; one extra row tells if there is a next page
+                cursor.execute(
+                    f'SELECT {_DOCUMENT_LIST_COLUMNS} FROM document_ingest_data '
+                    'WHERE (updated_at, id) < (?, ?) ORDER BY updated_at DESC, id DESC LIMIT ?',
+                    (after[0], after[1], per_page + 1)
+                )
+                documents = _rows_to_dicts(cursor)
+                has_next = len(documents) > per_page
+                del documents[per_page:]
+
+                return {
+                    'documents': documents,
+                    'pagination': {
+                        'per_page': per_page,
+                        'total': total,
+                        'has_next': has_next,
+                        'has_prev': True,
+                        'next_cursor': _document_cursor(documents[-1]) if has_next else None
+                    }
+                }
+
             # Get paginated documents
             cursor.execute(
-                'SELECT * FROM document_ingest_data ORDER BY updated_at DESC LIMIT ? OFFSET ?',
-                (per_page, offset)
+                f'SELECT {_DOCUMENT_LIST_COLUMNS} FROM document_ingest_data '
+                'ORDER BY updated_at DESC, id DESC LIMIT ? OFFSET ?',
+                (per_page, (page - 1) * per_page)
             )
-            documents = [dict(row) for row in cursor.fetchall()]
+            documents = _rows_to_dicts(cursor)
             
             # Calculate pagination info
             total_pages = (total + per_page - 1) // per_page
@@ -448,36 +1218,69 @@ class DatabaseService:
                     'total': total,
                     'total_pages': total_pages,
                     'has_next': has_next,
-                    'has_prev': has_prev
+                    'has_prev': has_prev,
+                    'next_cursor': _document_cursor(documents[-1]) if has_next and documents else None
                 }
             }
 
+    def iter_all_documents(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """Yield every document, newest first, in list-row form (with ``uploaded_at``).
+
+        Rows are read in keyset batches of ``batch_size``, each on a briefly borrowed
+        read connection, so a slow consumer never pins a pooled connection and the
+        table is never materialized at once.
+        """
+        after = None
+        while True:
+            with self._get_read_conn() as conn:
+                cursor = _plain_cursor(conn)
+                if after is None:
+                    cursor.execute(
+                        f'SELECT {_DOCUMENT_LIST_COLUMNS} FROM document_ingest_data '
+                        'ORDER BY updated_at DESC, id DESC LIMIT ?',
+                        (batch_size,)
+                    )
+                else:
+                    cursor.execute(
+                        f'SELECT {_DOCUMENT_LIST_COLUMNS} FROM document_ingest_data '
+                        'WHERE (updated_at, id) < (?, ?) ORDER BY updated_at DESC, id DESC LIMIT ?',
+                        (after[0], after[1], batch_size)
+                    )
+                documents = _rows_to_dicts(cursor)
+            yield from documents
+            if len(documents) < batch_size:
+                return
+            after = _document_cursor(documents[-1])
+
     def delete_document(self, document_id: str) -> bool:
         """Delete document by ID (cascades to chat history) and file storage."""
-        from ..storage import get_document_storage
-        
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        with self._transaction() as conn:
+            cursor = _plain_cursor(conn)
             
-            # Get filename before deleting from database
-            cursor.execute('SELECT filename FROM document_ingest_data WHERE id = ?', (document_id,))
-            result = cursor.fetchone()
+            if _HAS_RETURNING:
+                # Delete from database (cascades to chat history), getting the filename back
+                cursor.execute('DELETE FROM document_ingest_data WHERE id = ? RETURNING filename', (document_id,))
+                result = cursor.fetchone()
+            else:
+                # Get filename before deleting from database
+                cursor.execute('SELECT filename FROM document_ingest_data WHERE id = ?', (document_id,))
+                result = cursor.fetchone()
+                if result:
+                    cursor.execute('DELETE FROM document_ingest_data WHERE id = ?', (document_id,))
             
-            if result:
-                filename = result['filename']
+            deleted = result is not None
+            filename = None
+            if deleted:
+                filename, = result
                 
                 # Delete from file storage
-                storage = get_document_storage()
-                storage.delete_document(filename)
-            
-            # Delete from database (cascades to chat history)
-            cursor.execute('DELETE FROM document_ingest_data WHERE id = ?', (document_id,))
-            
-            deleted = cursor.rowcount > 0
-            if deleted:
-                logger.debug(f"Deleted document and file storage: {filename} (ID: {document_id})")
-            
-            return deleted
+                self._storage.delete_document(filename)
+                logger.debug("Deleted document and file storage: %s (ID: %s)", filename, document_id)
+        
+        # Invalidate only after the delete has committed
+        if filename is not None:
+            self._invalidate_document(document_id, filename)
+        return deleted
 
     def rename_document(self, document_id: str, new_filename: str) -> bool:
         """Rename a document."""
@@ -487,90 +1290,88 @@ class DatabaseService:
 
     def add_chat_message(self, document_id: str, sender: str, message: str, sources: Optional[List[Dict]] = None) -> int:
         """Add a chat message to the history."""
-        with self._get_connection() as conn:
+        with self._get_write_conn() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO document_chat_history (document_id, sender, message, sources)
-                VALUES (?, ?, ?, ?)
-            ''', (document_id, sender, message, json.dumps(sources) if sources else None))
+            cursor.execute(_INSERT_CHAT_MESSAGE_SQL, (document_id, sender, message, _dumps_sources(sources) if sources else None))
             return cursor.lastrowid
 
-    def get_chat_history(self, document_id: str, limit: Optional[int] = None, page: int = 1, per_page: int = 50) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
+    def add_chat_messages(self, messages: List[Tuple[str, str, str, Optional[List[Dict]]]]) -> int:
+        """Add several chat messages in one transaction.
+
+        Args:
+            messages: ``(document_id, sender, message, sources)`` tuples, inserted in order
+
+        Returns:
+            Number of messages inserted
+        """
+        rows = [
+            (document_id, sender, message, _dumps_sources(sources) if sources else None)
+            for document_id, sender, message, sources in messages
+        ]
+        if not rows:
+            return 0
+
+        with self._transaction() as conn:
+            conn.executemany(_INSERT_CHAT_MESSAGE_SQL, rows)
+        return len(rows)
+
+    def _fetch_chat_history(self, cursor: sqlite3.Cursor, document_id: str, limit: int = -1, offset: int = 0) -> List[Dict[str, Any]]:
+        """Fetch chat messages for a document on an existing cursor (``limit=-1`` = all).
+
+        ``sources`` is already parsed by the SOURCES_JSON converter.
+        """
+        cursor.execute(_CHAT_HISTORY_SQL, (document_id, limit, offset))
+        return _rows_to_dicts(cursor)
+
+    def get_chat_history(self, document_id: str, limit: Optional[int] = None, page: int = 1, per_page: int = 50,
+                         after_id: Optional[int] = None) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
         """Get chat history for a document with optional pagination.
         
-        Returns a list by default. Only returns a dict with pagination when explicitly requested via limit/page/per_page.
+        Returns a list by default. Only returns a dict with pagination when explicitly requested via
+        limit/page/per_page, or via ``after_id``: the ``next_cursor`` of a previous page, which seeks
+        to the following messages without counting or skipping earlier ones.
         """
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
             
+            if after_id is not None:
+                if per_page < 1 or per_page > 100:
+                    per_page = 50
+                # One extra row tells whether another page follows
+                cursor.execute(_CHAT_HISTORY_AFTER_SQL, (document_id, after_id, per_page + 1))
+                messages = _rows_to_dicts(cursor)
+                has_next = len(messages) > per_page
+                del messages[per_page:]
+                return {
+                    'messages': messages,
+                    'pagination': {
+                        'per_page': per_page,
+                        'has_next': has_next,
+                        'next_cursor': messages[-1]['id'] if has_next else None
+                    }
+                }
+
             # Determine if pagination is explicitly requested
             is_paginated_request = limit is None and (page != 1 or per_page != 50)
             
+            # All modes share one parameterized statement (LIMIT -1 = unbounded)
+            # so sqlite3's statement cache prepares it only once per connection
+            row_limit, offset = -1, 0
+            
             if limit is not None:
                 # Legacy mode: get limited number of messages
-                query = '''
-                    SELECT * FROM document_chat_history
-                    WHERE document_id = ?
-                    ORDER BY created_at ASC
-                    LIMIT ?
-                '''
-                cursor.execute(query, (document_id, limit))
+                row_limit = limit
             elif is_paginated_request:
                 # Paginated mode: return dict with pagination metadata
-                # Validate pagination parameters
-                if page < 1:
-                    page = 1
-                if per_page < 1 or per_page > 100:
-                    per_page = 50
-                    
-                offset = (page - 1) * per_page
-                
-                # Get total count
-                cursor.execute(
-                    'SELECT COUNT(*) as total FROM document_chat_history WHERE document_id = ?',
-                    (document_id,)
-                )
-                total = cursor.fetchone()['total']
-                
-                # Get paginated messages
-                query = '''
-                    SELECT * FROM document_chat_history
-                    WHERE document_id = ?
-                    ORDER BY created_at ASC
-                    LIMIT ? OFFSET ?
-                '''
-                cursor.execute(query, (document_id, per_page, offset))
-                
-                # Calculate pagination info
-                total_pages = (total + per_page - 1) // per_page
-                has_next = page < total_pages
-                has_prev = page > 1
-                
-                pagination_data = {
-                    'page': page,
-                    'per_page': per_page,
-                    'total': total,
-                    'total_pages': total_pages,
-                    'has_next': has_next,
-                    'has_prev': has_prev
-                }
-            else:
-                # Default mode: get all messages (no pagination metadata)
-                query = '''
-                    SELECT * FROM document_chat_history
-                    WHERE document_id = ?
-                    ORDER BY created_at ASC
-                '''
-                cursor.execute(query, (document_id,))
+                pagination_data = self._chat_pagination(cursor, document_id, page, per_page)
+                per_page = pagination_data['per_page']
+                row_limit, offset = per_page, (pagination_data['page'] - 1) * per_page
             
-            messages = []
-            for row in cursor.fetchall():
-                msg = dict(row)
-                msg['sources'] = json.loads(msg['sources']) if msg['sources'] else None
-                messages.append(msg)
+            messages = self._fetch_chat_history(cursor, document_id, row_limit, offset)
             
             # Return format depends on the type of request
             if is_paginated_request:
+                pagination_data['next_cursor'] = messages[-1]['id'] if pagination_data['has_next'] and messages else None
                 return {
                     'messages': messages,
                     'pagination': pagination_data
@@ -578,59 +1379,164 @@ class DatabaseService:
             else:
                 return messages
 
+    def _chat_pagination(self, cursor: sqlite3.Cursor, document_id: str, page: int, per_page: int) -> Dict[str, Any]:
+        """Validate page/per_page and count a document's messages for pagination metadata."""
+        if page < 1:
+            page = 1
+        if per_page < 1 or per_page > 100:
+            per_page = 50
+
+        # Counted on the covering index, without touching the table
+        cursor.execute('SELECT COUNT(*) FROM document_chat_history WHERE document_id = ?', (document_id,))
+        total = cursor.fetchone()[0]
+
+        total_pages = (total + per_page - 1) // per_page
+        return {
+            'page': page,
+            'per_page': per_page,
+            'total': total,
+            'total_pages': total_pages,
+            'has_next': page < total_pages,
+            'has_prev': page > 1
+        }
+
+    def get_chat_history_summary(self, document_id: str, page: int = 1, per_page: int = 50) -> Dict[str, Any]:
+        """Get a page of chat message metadata (id, sender, created_at) without bodies.
+
+        Served entirely from the covering chat index, for thread listings that
+        don't need message text or sources.
+        """
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            pagination_data = self._chat_pagination(cursor, document_id, page, per_page)
+            per_page = pagination_data['per_page']
+
+            cursor.execute(_CHAT_SUMMARY_SQL, (document_id, per_page, (pagination_data['page'] - 1) * per_page))
+            messages = [
+                {'id': msg_id, 'sender': sender, 'created_at': created_at}
+                for msg_id, sender, created_at in cursor.fetchall()
+            ]
+
+            return {
+                'messages': messages,
+                'pagination': pagination_data
+            }
+
     def clear_chat_history(self, document_id: str) -> bool:
         """Clear all chat history for a document."""
-        with self._get_connection() as conn:
+        with self._get_write_conn() as conn:
             cursor = conn.cursor()
             cursor.execute('DELETE FROM document_chat_history WHERE document_id = ?', (document_id,))
             return cursor.rowcount > 0
 
+    # ==================== RAG Cleanup Outbox ====================
+
+    def queue_rag_delete(self, filename: str):
+        """Record that ``filename``'s RAG chunks must be deleted by the cleanup worker."""
+        with self._get_write_conn() as conn:
+            conn.execute('INSERT INTO pending_rag_deletes (filename) VALUES (?)', (filename,))
+
+    def get_pending_rag_deletes(self, limit: int = 100) -> List[Tuple[int, str]]:
+        """Oldest queued RAG deletions as ``(id, filename)`` pairs."""
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute('SELECT id, filename FROM pending_rag_deletes ORDER BY id LIMIT ?', (limit,))
+            return cursor.fetchall()
+
+    def remove_pending_rag_deletes(self, ids: List[int]) -> int:
+        """Drop processed RAG deletions; returns the number removed."""
+        if not ids:
+            return 0
+        with self._transaction() as conn:
+            cursor = conn.executemany('DELETE FROM pending_rag_deletes WHERE id = ?', [(i,) for i in ids])
+            return cursor.rowcount
+
     def clear_all_data(self) -> bool:
         """Clear all data from the database (documents and chat history)."""
-        with self._get_connection() as conn:
+        with self._get_write_conn() as conn:
             cursor = conn.cursor()
-            # Delete all chat history first
-            cursor.execute('DELETE FROM document_chat_history')
-            chat_deleted = cursor.rowcount
+            # Count rows for the log before the tables are dropped
+            cursor.execute('SELECT COUNT(*) FROM document_chat_history')
+            chat_deleted = cursor.fetchone()[0]
+            cursor.execute('SELECT COUNT(*) FROM document_ingest_data')
+            docs_deleted = cursor.fetchone()[0]
             
-            # Delete all documents
-            cursor.execute('DELETE FROM document_ingest_data')
-            docs_deleted = cursor.rowcount
+            # Drop and recreate the tables (also resets the AUTOINCREMENT sequence)
+            cursor.executescript(_RESET_SQL)
             
-            # Reset the SQLite sequence
-            cursor.execute("DELETE FROM sqlite_sequence WHERE name='document_chat_history'")
-            
-            logger.info(f"Cleared database: {chat_deleted} chat history entries and {docs_deleted} documents deleted")
-            return True
+            logger.info("Cleared database: %d chat history entries and %d documents deleted", chat_deleted, docs_deleted)
+        
+        self.clear_document_cache()
+        return True
+
+    # ==================== Search Operations ====================
+
+    def search_documents(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over document filenames, summaries and content previews.
+
+        Returns matching document rows, best match first, each with a ``snippet``
+        of the matched text (matches in ``[brackets]``).
+        """
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute(_SEARCH_DOCUMENTS_SQL, (match, limit))
+            return _rows_to_dicts(cursor)
+
+    def search_chat_messages(self, query: str, document_id: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search over chat messages, optionally within one document."""
+        match = _fts_query(query)
+        if not match:
+            return []
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute(_SEARCH_CHAT_SQL, (match, document_id, document_id, limit))
+            return _rows_to_dicts(cursor)
 
     # ==================== Comprehensive Data Retrieval ====================
 
     def get_document_with_chat(self, document_id: str) -> Optional[Dict[str, Any]]:
         """Get document with its complete chat history."""
-        document = self.get_document_by_id(document_id)
-        if not document:
-            return None
+        return self._fetch_document_with_chat('id', document_id)
 
-        chat_history = self.get_chat_history(document_id)
+    def get_document_with_chat_by_filename(self, filename: str, include_content: bool = False) -> Optional[Dict[str, Any]]:
+        """Get document with chat history by filename, optionally including full content from file storage."""
+        return self._fetch_document_with_chat('filename', filename, include_content)
+
+    def _fetch_document_with_chat(self, column: str, value: str,
+                                  include_content: bool = False) -> Optional[Dict[str, Any]]:
+        """Load a document and its chat history in one query, messages aggregated as JSON."""
+        with self._cache_lock:
+            generation = self._cache_generation
+
+        with self._get_read_conn() as conn:
+            cursor = _plain_cursor(conn)
+            cursor.execute(_DOCUMENT_WITH_CHAT_SQL[column], (value,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+            document = _row_to_dict(cursor, row)
+
+        chat_history = document.pop('chat_json')
+        self._cache_document(document, generation)
+        if include_content:
+            self._attach_content(document)
 
         return {
             'document': document,
             'chat_history': chat_history
         }
 
-    def get_document_with_chat_by_filename(self, filename: str) -> Optional[Dict[str, Any]]:
-        """Get document with chat history by filename."""
-        document = self.get_document_by_filename(filename)
-        if not document:
-            return None
-
-        return self.get_document_with_chat(document['id'])
 
-
-# Thread-safe singleton implementation
+# Thread-safe singleton. Once created, functools.cache returns the instance
+# without entering the function; the lock only guards the first calls, which
+# can all miss the cache before any of them has returned.
 _db_service = None
 _db_service_lock = threading.Lock()
 
+@cache
 def get_db_service() -> DatabaseService:
     """
     Get or create the singleton database service instance with thread-safe initialization.
@@ -640,15 +1546,8 @@ def get_db_service() -> DatabaseService:
     """
     global _db_service
     
-    # Double-checked locking pattern for thread safety
-    if _db_service is None:
-        with _db_service_lock:
-            # Check again inside the lock to prevent race conditions
-            if _db_service is None:
-                logger.info("Initializing new DatabaseService singleton")
-                _db_service = DatabaseService()
-    else:
-        # Log when returning existing instance
-        logger.debug("Returning existing DatabaseService instance")
-    
-    return _db_service
+    with _db_service_lock:
+        if _db_service is None:
+            logger.info("Initializing new DatabaseService singleton")
+            _db_service = DatabaseService()
+        return _db_service
@@ -0,0 +1,34 @@
+"""Flask JSON provider backed by orjson."""
+from typing import Any, Optional, Union
+
+import orjson
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+# Dates go to Flask's default handler so they keep the HTTP date format of the
+# stdlib provider; everything else orjson serializes natively
+_DUMPS_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that serializes with orjson and writes responses as bytes.
+
+    Types orjson doesn't handle fall back to :meth:`DefaultJSONProvider.default`.
+    Keys are not sorted, and output is indented in debug mode like the default.
+    """
+
+    def _dumps_bytes(self, obj: Any, indent: Optional[int] = None) -> bytes:
+        option = _DUMPS_OPTIONS | orjson.OPT_INDENT_2 if indent else _DUMPS_OPTIONS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return self._dumps_bytes(obj, kwargs.get('indent')).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        # Bytes go straight into the response, skipping the str round-trip
+        return self._app.response_class(self._dumps_bytes(obj, indent) + b"\n", mimetype=self.mimetype)
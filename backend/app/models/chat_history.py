@@ -1,10 +1,11 @@
 """Chat history model for storing conversation messages."""
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, MISSING
+from operator import attrgetter
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatHistory:
     """
     Chat history model representing messages in document conversations.
@@ -27,22 +28,15 @@ class ChatHistory:
     @classmethod
     def from_dict(cls, data: dict) -> 'ChatHistory':
         """Create a ChatHistory instance from a dictionary."""
-        return cls(
-            id=data['id'],
-            document_id=data['document_id'],
-            sender=data['sender'],
-            message=data['message'],
-            sources=data.get('sources'),
-            created_at=data.get('created_at')
-        )
+        return cls(*[data[name] for name in _REQUIRED_FIELDS], *map(data.get, _OPTIONAL_FIELDS))
 
     def to_dict(self) -> dict:
         """Convert ChatHistory instance to a dictionary."""
-        return {
-            'id': self.id,
-            'document_id': self.document_id,
-            'sender': self.sender,
-            'message': self.message,
-            'sources': self.sources,
-            'created_at': self.created_at
-        }
+        return dict(zip(_FIELDS, _get_fields(self)))
+
+
+# Field names resolved once at import; dataclasses puts required fields first
+_FIELDS = tuple(field.name for field in fields(ChatHistory))
+_REQUIRED_FIELDS = tuple(field.name for field in fields(ChatHistory) if field.default is MISSING)
+_OPTIONAL_FIELDS = _FIELDS[len(_REQUIRED_FIELDS):]
+_get_fields = attrgetter(*_FIELDS)
@@ -1,10 +1,11 @@
 """Document model for storing document metadata and content."""
-from dataclasses import dataclass
+from dataclasses import dataclass, fields, MISSING
+from operator import attrgetter
 from datetime import datetime
 from typing import Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Document:
     """
     Document model representing ingested documents in the system.
@@ -33,28 +34,15 @@ class Document:
     @classmethod
     def from_dict(cls, data: dict) -> 'Document':
         """Create a Document instance from a dictionary."""
-        return cls(
-            id=data['id'],
-            filename=data['filename'],
-            content=data['content'],
-            summary=data.get('summary'),
-            word_count=data.get('word_count'),
-            line_count=data.get('line_count'),
-            chunk_count=data.get('chunk_count'),
-            created_at=data.get('created_at'),
-            updated_at=data.get('updated_at')
-        )
+        return cls(*[data[name] for name in _REQUIRED_FIELDS], *map(data.get, _OPTIONAL_FIELDS))
 
     def to_dict(self) -> dict:
         """Convert Document instance to a dictionary."""
-        return {
-            'id': self.id,
-            'filename': self.filename,
-            'content': self.content,
-            'summary': self.summary,
-            'word_count': self.word_count,
-            'line_count': self.line_count,
-            'chunk_count': self.chunk_count,
-            'created_at': self.created_at,
-            'updated_at': self.updated_at
-        }
+        return dict(zip(_FIELDS, _get_fields(self)))
+
+
+# Field names resolved once at import; dataclasses puts required fields first
+_FIELDS = tuple(field.name for field in fields(Document))
+_REQUIRED_FIELDS = tuple(field.name for field in fields(Document) if field.default is MISSING)
+_OPTIONAL_FIELDS = _FIELDS[len(_REQUIRED_FIELDS):]
+_get_fields = attrgetter(*_FIELDS)
@@ -1,55 +1,152 @@
 """Admin routes for database management."""
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 from app.database import get_db_service
 from app.services.retrieval import get_rag_service
+from app.utils.http_cache import cached_response, conditional_json
+from app.utils.http_stream import streaming_response
 import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import groupby
+from operator import itemgetter
 
 logger = logging.getLogger(__name__)
 bp = Blueprint('admin', __name__, url_prefix='/api/admin')
 
+# Tables shown by the viewer (FTS5 shadow tables hold index blobs and are left out)
+_LISTED_TABLES = "type = 'table' AND name NOT LIKE '%\\_fts\\_%' ESCAPE '\\'"
+
+# Tables at least this large (per sqlite_stat1) report an estimated row count
+_ESTIMATED_COUNT_MIN = 100_000
+
+# Seconds a passing ChromaDB pre-flight check is reused before checking again
+_CHROMA_CHECK_TTL = 30.0
+_chroma_check = {'last_ok': float('-inf')}
+
+# Rows fetched from SQLite per fetchmany() call while streaming table data
+_STREAM_BATCH_SIZE = 100
+
+# Primary key column per table, found together with the table's existence in one
+# query on first use (None: no single-column primary key)
+_table_pk_columns = {}
+
+
+def _lookup_table(cursor, table_name):
+    """Return ``(exists, pk_column)`` for a table; ``pk_column`` is None without a single-column key."""
+    if table_name not in _table_pk_columns:
+        cursor.execute("""
+            SELECT p.name, p.pk
+            FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p
+            WHERE m.type = 'table' AND m.name = ?
+        """, (table_name,))
+        columns = cursor.fetchall()
+        if not columns:
+            return False, None
+        pk_columns = [name for name, pk in columns if pk]
+        _table_pk_columns[table_name] = pk_columns[0] if len(pk_columns) == 1 else None
+    return True, _table_pk_columns[table_name]
+
+
+def _table_row_count(cursor, table_name: str, exact: bool = False) -> tuple:
+    """
+    Count a table's rows for the viewer's pagination.
+
+    COUNT(*) walks the whole table, so once ANALYZE (run by PRAGMA optimize
+    when the database closes) reports at least _ESTIMATED_COUNT_MIN rows the
+    sqlite_stat1 figure is returned instead.
+
+    Returns:
+        (row_count, is_estimate)
+    """
+    if not exact:
+        try:
+            cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = ? LIMIT 1", (table_name,))
+            row = cursor.fetchone()
+        except sqlite3.OperationalError:
+            # No sqlite_stat1 until ANALYZE has run once
+            row = None
+        if row and row[0]:
+            estimate = int(row[0].split()[0])
+            if estimate >= _ESTIMATED_COUNT_MIN:
+                return estimate, True
+
+    cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
+    return cursor.fetchone()[0], False
+
+
+def _dict_row_factory(column_names: tuple):
+    """Build a cursor row factory that returns rows as column-name dicts."""
+    def factory(cursor, row):
+        return dict(zip(column_names, row))
+    return factory
+
+
+@lru_cache(maxsize=256)
+def _build_update_row_sql(table_name, pk_column, columns):
+    """UPDATE statement for a table and tuple of columns; identical shapes reuse the string."""
+    set_clause = ', '.join([f"{k} = ?" for k in columns])
+    return f"UPDATE {table_name} SET {set_clause} WHERE {pk_column} = ?"
+
 
 @bp.route('/tables', methods=['GET'])
+@cached_response
 def get_tables():
     """Get list of all database tables and their info."""
     try:
         db = get_db_service()
         
-        with db._get_connection() as conn:
+        with db.read_conn() as conn:
             cursor = conn.cursor()
 
             # Get table names
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT name FROM sqlite_master
-                WHERE type='table'
+                WHERE {_LISTED_TABLES}
                 ORDER BY name
             """)
-            tables = cursor.fetchall()
-
-            table_info = []
-            for (table_name,) in tables:
-                # Get row count
-                cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-                row_count = cursor.fetchone()[0]
-
-                # Get column info
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = [
+            table_names = [name for (name,) in cursor.fetchall()]
+            if not table_names:
+                return conditional_json({'tables': []})
+
+            # Row counts for every table in one compound query
+            cursor.execute(
+                ' UNION ALL '.join(f"SELECT ?, COUNT(*) FROM {name}" for name in table_names),
+                table_names
+            )
+            row_counts = dict(cursor.fetchall())
+
+            # Column info for every table in one query via the pragma_table_info() function
+            cursor.execute(f"""
+                SELECT m.name, p.name, p.type, p."notnull", p.pk
+                FROM (SELECT name FROM sqlite_master WHERE {_LISTED_TABLES}) AS m,
+                     pragma_table_info(m.name) AS p
+                ORDER BY m.name, p.cid
+            """)
+            columns_by_table = {
+                table_name: [
                     {
-                        'name': col[1],
-                        'type': col[2],
-                        'nullable': not col[3],
-                        'primary_key': bool(col[5])
+                        'name': column_name,
+                        'type': column_type,
+                        'nullable': not notnull,
+                        'primary_key': bool(pk)
                     }
-                    for col in cursor.fetchall()
+                    for _, column_name, column_type, notnull, pk in rows
                 ]
+                for table_name, rows in groupby(cursor.fetchall(), key=itemgetter(0))
+            }
 
-                table_info.append({
+            table_info = [
+                {
                     'name': table_name,
-                    'row_count': row_count,
-                    'columns': columns
-                })
+                    'row_count': row_counts[table_name],
+                    'columns': columns_by_table.get(table_name, [])
+                }
+                for table_name in table_names
+            ]
 
-            return jsonify({'tables': table_info})
+            return conditional_json({'tables': table_info})
     except Exception as e:
         logger.error(f"Error getting tables: {e}")
         return jsonify({'error': str(e)}), 500
@@ -57,53 +154,80 @@ def get_tables():
 
 @bp.route('/table/<table_name>', methods=['GET'])
 def get_table_data(table_name):
-    """Get data from a specific table."""
+    """Get data from a specific table, streamed as JSON while rows are fetched."""
     try:
         db = get_db_service()
         
-        with db._get_connection() as conn:
+        with db.read_conn() as conn:
             cursor = conn.cursor()
 
-            # Validate table name exists
-            cursor.execute("""
-                SELECT name FROM sqlite_master
-                WHERE type='table' AND name=?
-            """, (table_name,))
-
-            if not cursor.fetchone():
+            # Validate table name exists and find its primary key
+            table_exists, pk_column = _lookup_table(cursor, table_name)
+            if not table_exists:
                 return jsonify({'error': 'Table not found'}), 404
 
-            # Get pagination params
+            # Get pagination params; after_pk is the next_cursor of the previous page
             page = request.args.get('page', 1, type=int)
             per_page = request.args.get('per_page', 50, type=int)
+            after_pk = request.args.get('after_pk')
             offset = (page - 1) * per_page
 
-            # Get total count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            total = cursor.fetchone()[0]
+            # Get total count, estimated from ANALYZE statistics for large tables
+            total, total_is_estimate = _table_row_count(
+                cursor, table_name, exact=request.args.get('exact_count', 0, type=int) == 1
+            )
+    except Exception as e:
+        logger.error(f"Error getting table data: {e}")
+        return jsonify({'error': str(e)}), 500
 
-            # Get data with pagination
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT ? OFFSET ?", (per_page, offset))
-            rows = cursor.fetchall()
+    # Get data with pagination: seek on the primary key when the client sends a
+    # cursor, otherwise skip rows; both walk the table in primary key order
+    if pk_column and after_pk is not None:
+        query = f"SELECT * FROM {table_name} WHERE {pk_column} > ? ORDER BY {pk_column} LIMIT ?"
+        params = (after_pk, per_page)
+    elif pk_column:
+        query = f"SELECT * FROM {table_name} ORDER BY {pk_column} LIMIT ? OFFSET ?"
+        params = (per_page, offset)
+    else:
+        query = f"SELECT * FROM {table_name} LIMIT ? OFFSET ?"
+        params = (per_page, offset)
+
+    # Bound now: the generator runs after the view returns, outside the app context
+    dumps = current_app.json.dumps
+
+    def generate():
+        with db.read_conn() as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, params)
+            cursor.arraysize = _STREAM_BATCH_SIZE
 
-            # Get column names
+            # Get column names; fetched rows then come back as ready-made dicts
             column_names = [description[0] for description in cursor.description]
-
-            # Convert rows to dicts
-            data = [dict(zip(column_names, row)) for row in rows]
-
-            return jsonify({
+            cursor.row_factory = _dict_row_factory(tuple(column_names))
+            header = {
                 'table': table_name,
                 'columns': column_names,
-                'data': data,
                 'total': total,
+                'total_is_estimate': total_is_estimate,
                 'page': page,
                 'per_page': per_page,
                 'total_pages': (total + per_page - 1) // per_page
-            })
-    except Exception as e:
-        logger.error(f"Error getting table data: {e}")
-        return jsonify({'error': str(e)}), 500
+            }
+            # Open the envelope and the data array; rows follow as they are fetched
+            yield dumps(header)[:-1] + ',"data":['
+
+            row_count = 0
+            last_row = None
+            while rows := cursor.fetchmany():
+                # One dumps call per batch, without the batch's enclosing brackets
+                yield ('' if row_count == 0 else ',') + dumps(rows)[1:-1]
+                row_count += len(rows)
+                last_row = rows[-1]
+
+            next_cursor = last_row[pk_column] if pk_column and row_count == per_page else None
+            yield '],"next_cursor":' + dumps(next_cursor) + '}\n'
+
+    return streaming_response(generate(), 'application/json')
 
 
 @bp.route('/table/<table_name>/row', methods=['PUT'])
@@ -119,35 +243,24 @@ def update_table_row(table_name):
 
         db = get_db_service()
         
-        with db._get_connection() as conn:
+        with db.write_conn() as conn:
             cursor = conn.cursor()
 
-            # Validate table exists
-            cursor.execute("""
-                SELECT name FROM sqlite_master
-                WHERE type='table' AND name=?
-            """, (table_name,))
-
-            if not cursor.fetchone():
+            # Validate table exists and get its primary key column name
+            table_exists, pk_column = _lookup_table(cursor, table_name)
+            if not table_exists:
                 return jsonify({'error': 'Table not found'}), 404
 
-            # Get primary key column name
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            pk_column = None
-            for col in cursor.fetchall():
-                if col[5]:  # pk flag
-                    pk_column = col[1]
-                    break
-
             if not pk_column:
                 return jsonify({'error': 'Table has no primary key'}), 400
 
-            # Build update query
-            set_clause = ', '.join([f"{k} = ?" for k in updates.keys()])
+            # Build update query (cached per update shape)
+            query = _build_update_row_sql(table_name, pk_column, tuple(updates))
             values = list(updates.values()) + [primary_key]
 
-            query = f"UPDATE {table_name} SET {set_clause} WHERE {pk_column} = ?"
             cursor.execute(query, values)
+            # Raw writes bypass DatabaseService, so its document cache must be dropped
+            db.clear_document_cache()
 
             return jsonify({
                 'message': 'Row updated successfully',
@@ -170,32 +283,22 @@ def delete_table_row(table_name):
 
         db = get_db_service()
         
-        with db._get_connection() as conn:
+        with db.write_conn() as conn:
             cursor = conn.cursor()
 
-            # Validate table exists
-            cursor.execute("""
-                SELECT name FROM sqlite_master
-                WHERE type='table' AND name=?
-            """, (table_name,))
-
-            if not cursor.fetchone():
+            # Validate table exists and get its primary key column name
+            table_exists, pk_column = _lookup_table(cursor, table_name)
+            if not table_exists:
                 return jsonify({'error': 'Table not found'}), 404
 
-            # Get primary key column name
-            cursor.execute(f"PRAGMA table_info({table_name})")
-            pk_column = None
-            for col in cursor.fetchall():
-                if col[5]:  # pk flag
-                    pk_column = col[1]
-                    break
-
             if not pk_column:
                 return jsonify({'error': 'Table has no primary key'}), 400
 
             # Delete row
             query = f"DELETE FROM {table_name} WHERE {pk_column} = ?"
             cursor.execute(query, (primary_key,))
+            # Raw writes bypass DatabaseService, so its document cache must be dropped
+            db.clear_document_cache()
 
             return jsonify({
                 'message': 'Row deleted successfully',
@@ -209,6 +312,9 @@ def delete_table_row(table_name):
 def _pre_flight_chroma_check(rag_service) -> bool:
     """
     Perform a pre-flight health check on ChromaDB.
+
+    A passing check is trusted for _CHROMA_CHECK_TTL seconds, so polling the
+    chroma endpoints doesn't add a collection round-trip to every request.
     
     Args:
         rag_service: RAGService instance to check
@@ -216,17 +322,22 @@ def _pre_flight_chroma_check(rag_service) -> bool:
     Returns:
         True if healthy, False otherwise
     """
+    if time.monotonic() - _chroma_check['last_ok'] < _CHROMA_CHECK_TTL:
+        return True
+
     try:
         # Simple health check - try to get collection info
         info = rag_service.get_collection_info()
-        logger.info(f"ChromaDB pre-flight check passed. Document count: {info.get('total_embeddings', 0)}")
+        logger.info("ChromaDB pre-flight check passed. Document count: %s", info.get('total_embeddings', 0))
+        _chroma_check['last_ok'] = time.monotonic()
         return True
     except Exception as e:
-        logger.warning(f"ChromaDB pre-flight check failed: {str(e)}")
+        logger.warning("ChromaDB pre-flight check failed: %s", e)
         return False
 
 
 @bp.route('/chroma/collections', methods=['GET'])
+@cached_response
 def get_chroma_collections():
     """Get ChromaDB collections info."""
     try:
@@ -234,11 +345,10 @@ def get_chroma_collections():
         
         # Pre-flight validation check ChromaDB health
         if not _pre_flight_chroma_check(rag):
-            logger.warning("ChromaDB pre-flight check failed, attempting reinitialization")
-            rag = get_rag_service()  # This will trigger reinitialization if needed
+            logger.warning("ChromaDB pre-flight check failed")
             
         collection_info = rag.get_collection_info()
-        return jsonify(collection_info)
+        return conditional_json(collection_info)
     except Exception as e:
         logger.error(f"Error getting ChromaDB info: {e}")
         return jsonify({'error': str(e)}), 500
@@ -246,14 +356,18 @@ def get_chroma_collections():
 
 @bp.route('/chroma/embeddings', methods=['GET'])
 def get_chroma_embeddings():
-    """Get ChromaDB embeddings with pagination at database level."""
+    """
+    Get ChromaDB embeddings with pagination at database level, as NDJSON.
+
+    The first line holds the pagination info (total, page, per_page,
+    total_pages); each following line is one embedding row.
+    """
     try:
         rag = get_rag_service()
         
         # Pre-flight validation check ChromaDB health
         if not _pre_flight_chroma_check(rag):
-            logger.warning("ChromaDB pre-flight check failed, attempting reinitialization")
-            rag = get_rag_service()  # This will trigger reinitialization if needed
+            logger.warning("ChromaDB pre-flight check failed")
         
         # Get pagination params
         page = request.args.get('page', 1, type=int)
@@ -261,12 +375,21 @@ def get_chroma_embeddings():
         document_id = request.args.get('document_id', None)
         
         # Get paginated embeddings using the RAGService method
-        result = rag.get_embeddings_paginated(page, per_page, document_id)
-        return jsonify(result)
+        pagination, embeddings = rag.iter_embeddings_paginated(page, per_page, document_id)
     except Exception as e:
         logger.error(f"Error getting embeddings: {e}")
         return jsonify({'error': str(e)}), 500
 
+    # Bound now: the generator runs after the view returns, outside the app context
+    dumps = current_app.json.dumps
+
+    def generate():
+        yield dumps(pagination) + '\n'
+        for embedding in embeddings:
+            yield dumps(embedding) + '\n'
+
+    return streaming_response(generate(), 'application/x-ndjson')
+
 
 @bp.route('/chroma/documents', methods=['GET'])
 def get_chroma_documents():
@@ -276,8 +399,7 @@ def get_chroma_documents():
         
         # Pre-flight validation check ChromaDB health
         if not _pre_flight_chroma_check(rag):
-            logger.warning("ChromaDB pre-flight check failed, attempting reinitialization")
-            rag = get_rag_service()  # This will trigger reinitialization if needed
+            logger.warning("ChromaDB pre-flight check failed")
         
         # Get pagination params
         page = request.args.get('page', 1, type=int)
@@ -367,11 +489,12 @@ def clear_all_databases():
         db = get_db_service()
         rag = get_rag_service()
         
-        # Clear SQLite database
-        sqlite_success = db.clear_all_data()
-        
-        # Clear ChromaDB
-        chroma_success = rag.clear_all_embeddings()
+        # SQLite and ChromaDB are independent stores, so clear them concurrently
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            sqlite_future = executor.submit(db.clear_all_data)
+            chroma_future = executor.submit(rag.clear_all_embeddings)
+            sqlite_success = sqlite_future.result()
+            chroma_success = chroma_future.result()
         
         if sqlite_success and chroma_success:
             return jsonify({'message': 'All databases cleared successfully'})
@@ -3,11 +3,13 @@ from flask import Blueprint, jsonify, request
 
 from app.database import get_db_service
 from app.utils.errors import handle_errors
+from app.utils.http_cache import cached_response
 
 bp = Blueprint('db_stats', __name__, url_prefix='/api/admin/db')
 
 
 @bp.route('/stats', methods=['GET'])
+@cached_response
 @handle_errors
 def get_database_stats():
     """Get database connection pool statistics."""
@@ -16,7 +18,7 @@ def get_database_stats():
     
     # Add basic database stats
     try:
-        with db_service._get_connection() as conn:
+        with db_service.read_conn() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) as doc_count FROM document_ingest_data")
             doc_count = cursor.fetchone()['doc_count']
@@ -39,6 +41,7 @@ def get_database_stats():
 
 
 @bp.route('/health', methods=['GET'])
+@cached_response
 @handle_errors
 def check_database_health():
     """Check database connectivity and health."""
@@ -46,20 +49,16 @@ def check_database_health():
     health_info = {
         'status': 'healthy',
         'message': 'Database operating normally',
-        'pool_status': get_db_service().get_pool_stats()
+        'pool_status': db_service.get_pool_stats()
     }
     
     # Test database connectivity
     try:
-        with db_service._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1 as test")
-            result = cursor.fetchone()
-            if result and result[0] == 1:
-                health_info['connectivity'] = 'ok'
-            else:
-                health_info['connectivity'] = 'failed'
-                health_info['status'] = 'degraded'
+        if db_service.ping():
+            health_info['connectivity'] = 'ok'
+        else:
+            health_info['connectivity'] = 'failed'
+            health_info['status'] = 'degraded'
     except Exception as e:
         health_info['status'] = 'unhealthy'
         health_info['message'] = f'Database connectivity issue: {str(e)}'
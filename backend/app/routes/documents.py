@@ -4,6 +4,7 @@ import logging
 
 from app.services.document_service import get_document_service
 from app.utils.errors import handle_errors
+from app.utils.http_cache import cached_response, conditional_json
 from app.utils.validators import validate_request, validate_file_upload
 
 bp = Blueprint('documents', __name__, url_prefix='/api/documents')
@@ -18,9 +19,23 @@ def upload_document():
     file = request.files['file']
     doc_service = get_document_service()
     result = doc_service.upload_document(file)
+    if result.get('index_status') == 'indexing':
+        # Saved; indexing continues in the background (see /<filename>/status)
+        return jsonify(result), 202
     return jsonify(result), 201 if not result.get('is_update') else 200
 
 
+@bp.route('/bulk-upload', methods=['POST'])
+@handle_errors
+@validate_file_upload(allowed_extensions=['txt', 'md'], field='files', multiple=True)
+def bulk_upload_documents():
+    """Upload and index several documents at once. Existing documents are replaced."""
+    files = request.files.getlist('files')
+    doc_service = get_document_service()
+    result = doc_service.bulk_upload(files)
+    return jsonify(result), 201
+
+
 @bp.route('/create-from-search', methods=['POST'])
 @handle_errors
 @validate_request({
@@ -35,10 +50,11 @@ def create_from_search():
         query=data['query'],
         filename=data['filename']
     )
-    return jsonify(result), 201
+    return jsonify(result), 202 if result.get('index_status') == 'indexing' else 201
 
 
 @bp.route('/', methods=['GET'])
+@cached_response
 @handle_errors
 def list_documents():
     """List all indexed documents with pagination."""
@@ -51,9 +67,28 @@ def list_documents():
         page = 1
     if per_page < 1 or per_page > 100:
         per_page = 20
+
+    # Keyset pagination: the next_cursor pair returned with the previous page
+    after_updated_at = request.args.get('after_updated_at')
+    after_id = request.args.get('after_id')
+    after = (after_updated_at, after_id) if after_updated_at and after_id else None
     
     doc_service = get_document_service()
-    result = doc_service.get_paginated_documents(page, per_page)
+    result = doc_service.get_paginated_documents(page, per_page, after)
+    return conditional_json(result)
+
+
+@bp.route('/search', methods=['GET'])
+@handle_errors
+def search_documents():
+    """Full-text search over document summaries/previews and chat messages."""
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', 20, type=int)
+    if limit < 1 or limit > 100:
+        limit = 20
+
+    doc_service = get_document_service()
+    result = doc_service.search(query, limit)
     return jsonify(result), 200
 
 
@@ -88,6 +123,14 @@ def delete_document(filename):
     return jsonify(result), 200
 
 
+@bp.route('/<filename>/status', methods=['GET'])
+@handle_errors
+def get_document_status(filename):
+    """Get a document's background indexing status."""
+    doc_service = get_document_service()
+    return jsonify(doc_service.get_index_status(filename)), 200
+
+
 @bp.route('/<filename>/data', methods=['GET'])
 @handle_errors
 def get_document_data(filename):
@@ -20,7 +20,8 @@ logger = logging.getLogger(__name__)
 def query_documents():
     """Query the document store using RAG and save to chat history."""
     data = request.get_json()
-    logger.info(f"Query received: question='{data['question']}', document_id='{data['document_id']}', top_k={data.get('top_k', 5)}")
+    logger.info("Query received: question='%s', document_id='%s', top_k=%s",
+                data['question'], data['document_id'], data.get('top_k', 5))
     
     query_service = get_query_service()
     result = query_service.query_documents(
@@ -29,5 +30,5 @@ def query_documents():
         top_k=data.get('top_k', 5)
     )
     
-    logger.info(f"Query result: answer='{result.get('answer', '')[:100]}...'")
+    logger.info("Query result: answer='%.100s...'", result.get('answer', ''))
     return jsonify(result), 200
@@ -1,15 +1,32 @@
 """Document service for handling document business logic."""
+import io
 import logging
-from typing import Dict, Any, Optional, List
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import cache
+from typing import Dict, Any, Iterator, Optional, List, Tuple
 from werkzeug.datastructures import FileStorage
 
+from app.config import Config
 from app.database import get_db_service
+from app.services.indexing_queue import IndexingQueue
+from app.services.rag_cleanup import RagCleanupWorker
 from app.services.retrieval import get_rag_service
 from app.services.search.search_services_manager import get_search_service_manager
+from app.storage import compute_content_hash
+from app.storage.document_storage import LEGACY_CONTENT_HASH_ALGO
 from app.utils.errors import NotFoundError, ValidationError
+from app.utils.string_utils import count_words_and_lines
+
+__all__ = ['DocumentService', 'get_document_service']
 
 logger = logging.getLogger(__name__)
 
+# Local time, as shown in the footer of documents created from web search
+_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
 
 class DocumentService:
     """Service for managing document operations."""
@@ -18,22 +35,26 @@ class DocumentService:
         self.db = get_db_service()
         self.rag = get_rag_service()
         self.search_manager = get_search_service_manager()
-        logger.info("DocumentService initialized")
+        # Only set in async index mode; uploads then return before indexing
+        self._indexing_queue = IndexingQueue(self._index_saved_document) if Config.INDEX_MODE == 'async' else None
+        self._rag_cleanup = RagCleanupWorker(self.db, self.rag.delete_document, Config.RAG_CLEANUP_INTERVAL)
+        logger.info("DocumentService initialized (index mode: %s)", Config.INDEX_MODE)
     
     def _get_current_timestamp(self) -> str:
         """Get current timestamp in a readable format"""
-        from datetime import datetime
-        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        # time.strftime formats the local time directly, without building a datetime
+        return time.strftime(_TIMESTAMP_FORMAT)
     
     def _reindex_document(self, filename: str, content: str, is_new: bool = False) -> int:
         """
         Helper method to reindex a document in RAG and calculate metadata.
-        Handles deletion of old chunks (for updates) and indexing of new content.
+        For updates, only chunks whose text changed are embedded; the old
+        chunks that no longer appear are deleted.
         
         Args:
             filename: Document filename
             content: Document content
-            is_new: Whether this is a new document (skip deletion of old chunks)
+            is_new: Whether this is a new document (skip matching against old chunks)
             
         Returns:
             Number of chunks created
@@ -41,21 +62,158 @@ class DocumentService:
         Raises:
             ValidationError: If indexing fails
         """
-        # Only delete old RAG chunks if updating an existing document
-        if not is_new:
-            try:
-                self.rag.delete_document(filename)
-            except Exception as e:
-                logger.warning(f"Failed to delete old chunks for {filename}: {str(e)}")
-        
-        # Index in RAG
+        if is_new:
+            return self._index_chunks(filename, content)
+
         try:
-            chunk_count = self.rag.index_document(filename, content)
+            embedded, _, reused = self.rag.index_document_incremental(filename, content)
         except Exception as e:
-            logger.error(f"Failed to index document {filename}: {str(e)}")
+            logger.error("Failed to reindex document %s: %s", filename, e)
+            raise ValidationError(f"Failed to index document: {str(e)}")
+        return embedded + reused
+
+    def _content_unchanged(self, document: Dict[str, Any], content: str) -> bool:
+        """
+        Whether ``content`` is what ``document`` already holds, fully indexed.
+
+        Compares against the stored content hash, with the algorithm it was
+        recorded in, so re-uploading an identical file can skip re-embedding.
+        """
+        if document.get('index_status') != 'ready' or not document.get('content_hash'):
+            return False
+        algo = document.get('content_hash_algo') or LEGACY_CONTENT_HASH_ALGO
+        return compute_content_hash(content.encode('utf-8'), algo) == document['content_hash']
+
+    def _copy_duplicate_chunks(self, filename: str, content: str, is_update: bool) -> Optional[int]:
+        """
+        Index ``filename`` from another document holding the same content, if there is one.
+
+        The duplicate's embedded chunks are copied under the new name, so
+        identical bytes uploaded under a second filename cost no embedding.
+
+        Returns:
+            Number of chunks copied, or None if there is no usable duplicate
+            and the content must be indexed normally
+        """
+        source = self.db.get_document_by_content_hash(compute_content_hash(content.encode('utf-8')))
+        if not source or source['filename'] == filename or not source.get('chunk_count'):
+            return None
+
+        if is_update:
+            self._delete_old_chunks(filename)
+        try:
+            copied = self.rag.copy_document_chunks(source['filename'], filename)
+        except Exception as e:
+            logger.warning("Failed to copy chunks of %s to %s: %s", source['filename'], filename, e)
+            return None
+        if not copied:
+            return None
+        logger.debug("Indexed %s from duplicate content of %s", filename, source['filename'])
+        return copied
+
+    def _unchanged_upload_result(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark an identical re-upload as updated and describe the stored document."""
+        self.db.touch_document(document['id'])
+        logger.debug("Content unchanged for %s, skipping reindex", document['filename'])
+        return {
+            'message': 'Document unchanged',
+            'filename': document['filename'],
+            'document_id': document['id'],
+            'is_update': True,
+            'word_count': document.get('word_count'),
+            'line_count': document.get('line_count'),
+            'chunk_count': document.get('chunk_count')
+        }
+
+    def _delete_old_chunks(self, filename: str):
+        """Delete a document's RAG chunks, logging (not raising) on failure."""
+        try:
+            self.rag.delete_document(filename)
+        except Exception as e:
+            logger.warning("Failed to delete old chunks for %s: %s", filename, e)
+
+    def _queue_chunk_cleanup(self, filename: str):
+        """Hand a failed save's RAG chunks to the cleanup worker instead of deleting them inline."""
+        try:
+            self.db.queue_rag_delete(filename)
+        except Exception as e:
+            # The outbox is in the same database that just failed; fall back to deleting now
+            logger.warning("Failed to queue RAG cleanup for %s: %s", filename, e)
+            self._delete_old_chunks(filename)
+            return
+        self._rag_cleanup.notify()
+
+    def _index_chunks(self, filename: str, content: str) -> int:
+        """
+        Index document content in RAG.
+
+        Returns:
+            Number of chunks created
+
+        Raises:
+            ValidationError: If indexing fails
+        """
+        try:
+            return self.rag.index_document(filename, content)
+        except Exception as e:
+            logger.error("Failed to index document %s: %s", filename, e)
             raise ValidationError(f"Failed to index document: {str(e)}")
-        
-        return chunk_count
+
+    def _save_for_indexing(self, filename: str, content: str,
+                           document_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Save a document marked 'indexing' and queue it for background indexing.
+
+        Args:
+            filename: Document filename
+            content: Document content
+            document_id: ID of the existing document to update; None creates one
+
+        Returns:
+            Tuple of (document_id, saved metadata)
+
+        Raises:
+            ValidationError: If the database write fails
+        """
+        word_count, line_count = count_words_and_lines(content)
+        metadata = {
+            'word_count': word_count,
+            'line_count': line_count,
+            'index_status': 'indexing'
+        }
+
+        try:
+            if document_id:
+                # chunk_count keeps its old value until the worker has reindexed
+                self.db.update_document(document_id, {'content': content, **metadata})
+            else:
+                metadata['chunk_count'] = 0
+                document_id = self.db.create_document(filename, content, metadata)
+        except Exception as e:
+            logger.error("Database operation failed for %s: %s", filename, e)
+            raise ValidationError(f"Failed to save document: {str(e)}")
+
+        self._indexing_queue.submit(document_id)
+        return document_id, metadata
+
+    def _index_saved_document(self, document_id: str):
+        """Indexing worker job: reindex a saved document's current content and mark it ready."""
+        document = self.db.get_document_by_id(document_id)
+        if not document:
+            logger.info("Skipping indexing of deleted document %s", document_id)
+            return
+
+        filename = document['filename']
+        content = self.db.get_document_content(document_id)
+        try:
+            chunk_count = self._reindex_document(filename, content, is_new=False)
+        except ValidationError:
+            self.db.update_document(document_id, {'index_status': 'failed'})
+            return
+
+        if not self.db.update_document(document_id, {'chunk_count': chunk_count, 'index_status': 'ready'}):
+            # Deleted while it was being indexed; don't leave its chunks behind
+            self._delete_old_chunks(filename)
 
     def upload_document(self, file: FileStorage) -> Dict[str, Any]:
         """
@@ -74,46 +232,56 @@ class DocumentService:
 
         # Read file content
         try:
-            content = file.read().decode('utf-8')
+            content = _read_text(file)
         except UnicodeDecodeError as e:
-            logger.error(f"Failed to decode file {filename}: {str(e)}")
+            logger.error("Failed to decode file %s: %s", filename, e)
             raise ValidationError("File must be valid UTF-8 encoded text")
 
-        # Check if document exists
         existing_doc = self.db.get_document_by_filename(filename)
         is_update = existing_doc is not None
-        document_id = existing_doc['id'] if is_update else None
-
-        # Reindex document (handles deletion of old chunks and indexing new content)
-        chunk_count = self._reindex_document(filename, content, is_new=not is_update)
-
-        # Calculate document statistics
-        word_count = len(content.split())
-        line_count = len(content.splitlines())
-
-        metadata = {
-            'word_count': word_count,
-            'line_count': line_count,
-            'chunk_count': chunk_count
-        }
+        if is_update and self._content_unchanged(existing_doc, content):
+            return self._unchanged_upload_result(existing_doc)
+
+        if self._indexing_queue is not None:
+            document_id, metadata = self._save_for_indexing(
+                filename, content, existing_doc['id'] if is_update else None
+            )
+            return {
+                'message': 'Document saved, indexing in background',
+                'filename': filename,
+                'document_id': document_id,
+                'is_update': is_update,
+                **metadata
+            }
+
+        # Until the row is saved, only this claim keeps the cleanup worker from
+        # deleting the chunks written here for a name it has queued
+        with self._rag_cleanup.indexing(filename):
+            # Identical content already indexed under another name: copy its chunks.
+            # Otherwise reindex against any old chunks for this name (a new filename
+            # normally has none, so that lookup is cheap there)
+            chunk_count = self._copy_duplicate_chunks(filename, content, is_update)
+            if chunk_count is None:
+                chunk_count = self._reindex_document(filename, content)
+
+            # Calculate document statistics
+            word_count, line_count = count_words_and_lines(content)
+
+            metadata = {
+                'word_count': word_count,
+                'line_count': line_count,
+                'chunk_count': chunk_count
+            }
 
-        # Save to database
-        try:
-            if is_update:
-                self.db.update_document(document_id, {
-                    'content': content,
-                    **metadata
-                })
-            else:
-                document_id = self.db.create_document(filename, content, metadata)
-        except Exception as e:
-            logger.error(f"Database operation failed for {filename}: {str(e)}")
-            # Try to clean up RAG chunks if DB fails
+            # Save to database: one upsert decides create vs. update at write time
             try:
-                self.rag.delete_document(filename)
-            except:
-                pass
-            raise ValidationError(f"Failed to save document: {str(e)}")
+                document_id, is_new = self.db.upsert_document(filename, content, metadata)
+                is_update = not is_new
+            except Exception as e:
+                logger.error("Database operation failed for %s: %s", filename, e)
+                # The chunks just indexed belong to no saved document now
+                self._queue_chunk_cleanup(filename)
+                raise ValidationError(f"Failed to save document: {str(e)}")
 
         return {
             'message': 'Document updated successfully' if is_update else 'Document uploaded successfully',
@@ -123,6 +291,139 @@ class DocumentService:
             **metadata
         }
 
+    def bulk_upload(self, files: List[FileStorage]) -> Dict[str, Any]:
+        """
+        Upload and index several documents, saving them all in one transaction.
+
+        Files are indexed concurrently, so their chunks share embedding batches.
+        The batch is then saved whole or not at all: if any file fails to
+        index or save, new files' chunks are deleted and existing files are
+        reindexed from their saved content.
+
+        Args:
+            files: File upload objects with distinct filenames
+
+        Returns:
+            Dict with one upload_document-style entry per file, in the order given
+
+        Raises:
+            ValidationError: If a file cannot be read, a filename repeats, or
+                indexing or saving fails
+        """
+        contents = {}
+        for file in files:
+            if file.filename in contents:
+                raise ValidationError(f"Duplicate filename in upload: {file.filename}")
+            try:
+                contents[file.filename] = _read_text(file)
+            except UnicodeDecodeError as e:
+                logger.error("Failed to decode file %s: %s", file.filename, e)
+                raise ValidationError(f"File must be valid UTF-8 encoded text: {file.filename}")
+
+        existing = {filename: self.db.get_document_by_filename(filename) for filename in contents}
+        # Identical re-uploads are answered from the stored document and not reindexed
+        unchanged = [
+            filename for filename in contents
+            if existing[filename] is not None and self._content_unchanged(existing[filename], contents[filename])
+        ]
+        order = list(contents)
+        for filename in unchanged:
+            del contents[filename]
+
+        metadata = {}
+        for filename, content in contents.items():
+            word_count, line_count = count_words_and_lines(content)
+            metadata[filename] = {'word_count': word_count, 'line_count': line_count}
+
+        if self._indexing_queue is not None:
+            for filename in contents:
+                metadata[filename]['index_status'] = 'indexing'
+                if existing[filename] is None:
+                    metadata[filename]['chunk_count'] = 0
+
+        with ExitStack() as claims:
+            if self._indexing_queue is None:
+                # As in upload_document: claimed from indexing until the rows are saved
+                for filename in contents:
+                    claims.enter_context(self._rag_cleanup.indexing(filename))
+
+                with ThreadPoolExecutor(max_workers=max(1, Config.EMBED_CONCURRENCY)) as executor:
+                    futures = {
+                        filename: executor.submit(self._reindex_document, filename, content,
+                                                  existing[filename] is None)
+                        for filename, content in contents.items()
+                    }
+                # Leaving the pool waited for every file, so cleanup can't race an indexing job
+                error = next((future.exception() for future in futures.values() if future.exception()), None)
+                if error is not None:
+                    # Nothing is saved; don't leave chunks for content that won't exist
+                    self._undo_bulk_indexing(contents, existing, queue=False)
+                    raise error
+                for filename, future in futures.items():
+                    metadata[filename]['chunk_count'] = future.result()
+
+            new_records = [
+                (filename, content, metadata[filename])
+                for filename, content in contents.items() if existing[filename] is None
+            ]
+            updates = [
+                (existing[filename]['id'], {'content': content, **metadata[filename]})
+                for filename, content in contents.items() if existing[filename] is not None
+            ]
+            try:
+                new_ids = iter(self.db.bulk_save_documents(new_records, updates))
+            except Exception as e:
+                logger.error("Database operation failed for bulk upload: %s", e)
+                if self._indexing_queue is None:
+                    self._undo_bulk_indexing(contents, existing, queue=True)
+                raise ValidationError(f"Failed to save documents: {str(e)}")
+
+        document_ids = {
+            filename: existing[filename]['id'] if existing[filename] is not None else next(new_ids)
+            for filename in contents
+        }
+        if self._indexing_queue is not None:
+            for document_id in document_ids.values():
+                self._indexing_queue.submit(document_id)
+
+        # Only once the batch is saved: a failed batch leaves every row as it was
+        unchanged_results = {filename: self._unchanged_upload_result(existing[filename]) for filename in unchanged}
+
+        return {
+            'message': f'{len(order)} documents uploaded successfully',
+            'documents': [
+                unchanged_results[filename] if filename in unchanged_results else {
+                    'filename': filename,
+                    'document_id': document_ids[filename],
+                    'is_update': existing[filename] is not None,
+                    **metadata[filename]
+                }
+                for filename in order
+            ]
+        }
+
+    def _undo_bulk_indexing(self, contents: Dict[str, str], existing: Dict[str, Optional[Dict[str, Any]]],
+                            queue: bool):
+        """
+        Put RAG back as it was before a bulk upload that won't be saved.
+
+        New files' chunks are deleted (through the cleanup outbox when
+        ``queue``); existing files were already reindexed with unsaved content,
+        so they are reindexed again from the content their rows still hold.
+        """
+        for filename in contents:
+            document = existing[filename]
+            if document is None:
+                if queue:
+                    self._queue_chunk_cleanup(filename)
+                else:
+                    self._delete_old_chunks(filename)
+                continue
+            try:
+                self.rag.index_document_incremental(filename, self.db.get_document_content(document['id']) or '')
+            except Exception as e:
+                logger.error("Failed to restore RAG chunks of %s to its saved content: %s", filename, e)
+
     def create_from_search(self, query: str, filename: str) -> Dict[str, Any]:
         """
         Create a document from web search results using Perplexity API.
@@ -137,7 +438,7 @@ class DocumentService:
         Raises:
             ValidationError: If search fails or document creation fails
         """
-        logger.info(f"Creating document from search: query='{query}', filename={filename}")
+        logger.info("Creating document from search: query='%s', filename=%s", query, filename)
 
         # Check if filename already exists
         existing = self.db.get_document_by_filename(filename)
@@ -148,9 +449,9 @@ class DocumentService:
         try:
             search_service = self.search_manager.getService("perplexity")
             search_results = search_service.search(query, max_tokens=2000, temperature=0.1)
-            logger.info(f"Search returned {len(search_results)} results")
+            logger.info("Search returned %d results", len(search_results))
         except Exception as e:
-            logger.error(f"Search failed for query '{query}': {str(e)}")
+            logger.error("Search failed for query '%s': %s", query, e)
             raise ValidationError(f"Search failed: {str(e)}")
 
         # Return error if no search results (e.g., API unauthorized or no content)
@@ -158,62 +459,44 @@ class DocumentService:
             raise ValidationError("Search returned no results. This may be due to an invalid Perplexity API key or other search service issues.")
 
         # Format content for search results
-        content_parts = [f"# Search Results for: {query}\n"]
-        
-        for result in search_results:
-            # Handle generated content
-            if result.is_generated:
-                content_parts.append(f"\n## Generated Answer\n")
-                content_parts.append(result.content)
-                
-                # Add citations if available
-                if result.citations:
-                    content_parts.append(f"\n### Sources\n")
-                    for j, citation in enumerate(result.citations, 1):
-                        content_parts.append(f"{j}. {citation}")
-            # Handle citation links
-            elif result.metadata.get('is_citation'):
-                content_parts.append(f"\n### {result.title}\n")
-                content_parts.append(f"Source URL: {result.url}\n")
-            # Regular search results
-            else:
-                content_parts.append(f"\n## {result.title}")
-                if result.url:
-                    content_parts.append(f"URL: {result.url}")
-                content_parts.append(f"\n{result.content}\n")
-        
-        content_parts.append("\n---\n")
-        content_parts.append(f"*Document created from web search using {search_service.get_service_name()}*\n")
-        content_parts.append(f"*Query: {query}*\n")
-        content_parts.append(f"*Generated on: {self._get_current_timestamp()}*")
-        
-        content = '\n'.join(content_parts)
+        content = _format_search_results(
+            query, search_results, search_service.get_service_name(), self._get_current_timestamp()
+        )
+
+        if self._indexing_queue is not None:
+            document_id, metadata = self._save_for_indexing(filename, content)
+            return {
+                'message': 'Document created from web search, indexing in background',
+                'filename': filename,
+                'document_id': document_id,
+                'content': content,
+                'search_query': query,
+                'search_sources': len(search_results),
+                **metadata
+            }
 
         # Calculate statistics
-        word_count = len(content.split())
-        line_count = len(content.splitlines())
+        word_count, line_count = count_words_and_lines(content)
 
-        # Index in RAG (this is a new document, so skip deletion of old chunks)
-        chunk_count = self._reindex_document(filename, content, is_new=True)
+        with self._rag_cleanup.indexing(filename):
+            # Index in RAG (this is a new document, so skip deletion of old chunks)
+            chunk_count = self._reindex_document(filename, content, is_new=True)
 
-        # Save to database
-        metadata = {
-            'word_count': word_count,
-            'line_count': line_count,
-            'chunk_count': chunk_count
-        }
+            # Save to database
+            metadata = {
+                'word_count': word_count,
+                'line_count': line_count,
+                'chunk_count': chunk_count
+            }
 
-        try:
-            document_id = self.db.create_document(filename, content, metadata)
-            logger.debug(f"Created search document {filename} with ID {document_id}")
-        except Exception as e:
-            logger.error(f"Failed to save search document: {str(e)}")
-            # Clean up RAG chunks
             try:
-                self.rag.delete_document(filename)
-            except:
-                pass
-            raise ValidationError(f"Failed to save document: {str(e)}")
+                document_id = self.db.create_document(filename, content, metadata)
+                logger.debug("Created search document %s with ID %s", filename, document_id)
+            except Exception as e:
+                logger.error("Failed to save search document: %s", e)
+                # The chunks just indexed belong to no saved document now
+                self._queue_chunk_cleanup(filename)
+                raise ValidationError(f"Failed to save document: {str(e)}")
 
         return {
             'message': 'Document created from web search',
@@ -225,26 +508,22 @@ class DocumentService:
             **metadata
         }
 
-    def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get all documents with formatted data (legacy method for backward compatibility)."""
-        result = self.db.get_all_documents(page=1, per_page=1000)  # Large page for backward compatibility
-        documents = result['documents']
-
-        # Format timestamps
-        for doc in documents:
-            doc['uploaded_at'] = doc.get('created_at')
-
-        return documents
+    def get_all_documents(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over every document, newest first (legacy method for backward compatibility)."""
+        return self.db.iter_all_documents()
     
-    def get_paginated_documents(self, page: int = 1, per_page: int = 20) -> Dict[str, Any]:
-        """Get documents with pagination."""
-        result = self.db.get_all_documents(page=page, per_page=per_page)
-
-        # Format timestamps
-        for doc in result['documents']:
-            doc['uploaded_at'] = doc.get('created_at')
+    def get_paginated_documents(self, page: int = 1, per_page: int = 20,
+                                after: Optional[Tuple[str, str]] = None) -> Dict[str, Any]:
+        """Get documents with pagination, by page number or by a previous page's next_cursor."""
+        return self.db.get_all_documents(page=page, per_page=per_page, after=after)
 
-        return result
+    def search(self, query: str, limit: int = 20) -> Dict[str, Any]:
+        """Full-text search over documents and chat messages."""
+        return {
+            'query': query,
+            'documents': self.db.search_documents(query, limit),
+            'messages': self.db.search_chat_messages(query, limit=limit)
+        }
 
     def get_document(self, filename: str) -> Dict[str, Any]:
         """
@@ -259,43 +538,64 @@ class DocumentService:
         Raises:
             NotFoundError: If document doesn't exist
         """
-        logger.debug(f"Fetching document: {filename}")
+        logger.debug("Fetching document: %s", filename)
         document = self.db.get_document_by_filename(filename, include_content=True)
 
         if not document:
-            logger.warning(f"Document not found: {filename}")
+            logger.warning("Document not found: %s", filename)
             raise NotFoundError(f"Document '{filename}' not found")
 
         return document
 
-    def get_document_with_chat(self, filename: str) -> Dict[str, Any]:
+    def get_index_status(self, filename: str) -> Dict[str, Any]:
         """
-        Get document with chat history, loading content from file storage.
+        Get a document's indexing state.
 
         Args:
             filename: Document filename
 
         Returns:
-            Document data with chat history and full content. chat_history is always a list.
+            Dict with document_id, filename, index_status ('indexing', 'ready'
+            or 'failed') and chunk_count
 
         Raises:
             NotFoundError: If document doesn't exist
         """
-        logger.debug(f"Fetching document with chat: {filename}")
-        document = self.db.get_document_by_filename(filename, include_content=True)
+        document = self.db.get_document_by_filename(filename)
 
         if not document:
-            logger.warning(f"Document not found: {filename}")
             raise NotFoundError(f"Document '{filename}' not found")
 
-        # Get chat history (always returns a list by default)
-        chat_history = self.db.get_chat_history(document['id'])
-
         return {
-            'document': document,
-            'chat_history': chat_history
+            'document_id': document['id'],
+            'filename': filename,
+            'index_status': document['index_status'],
+            'chunk_count': document['chunk_count']
         }
 
+    def get_document_with_chat(self, filename: str) -> Dict[str, Any]:
+        """
+        Get document with chat history, loading content from file storage.
+
+        Args:
+            filename: Document filename
+
+        Returns:
+            Document data with chat history and full content. chat_history is always a list.
+
+        Raises:
+            NotFoundError: If document doesn't exist
+        """
+        logger.debug("Fetching document with chat: %s", filename)
+        # Document row and chat history come back from a single query
+        data = self.db.get_document_with_chat_by_filename(filename, include_content=True)
+
+        if not data:
+            logger.warning("Document not found: %s", filename)
+            raise NotFoundError(f"Document '{filename}' not found")
+
+        return data
+
     def update_document(self, filename: str, content: str) -> Dict[str, Any]:
         """
         Update document content.
@@ -311,21 +611,24 @@ class DocumentService:
             NotFoundError: If document doesn't exist
             ValidationError: If update fails
         """
-        logger.debug(f"Updating document: {filename}")
+        logger.debug("Updating document: %s", filename)
         document = self.db.get_document_by_filename(filename)
 
         if not document:
-            logger.warning(f"Document not found: {filename}")
+            logger.warning("Document not found: %s", filename)
             raise NotFoundError(f"Document '{filename}' not found")
 
         document_id = document['id']
 
+        if self._content_unchanged(document, content):
+            self._unchanged_upload_result(document)
+            return {'message': 'Document unchanged'}
+
         # Reindex document with new content (delete old chunks since this is an update)
         chunk_count = self._reindex_document(filename, content, is_new=False)
 
         # Update database
-        word_count = len(content.split())
-        line_count = len(content.splitlines())
+        word_count, line_count = count_words_and_lines(content)
 
         try:
             self.db.update_document(document_id, {
@@ -334,9 +637,9 @@ class DocumentService:
                 'line_count': line_count,
                 'chunk_count': chunk_count
             })
-            logger.debug(f"Updated document {filename} in database")
+            logger.debug("Updated document %s in database", filename)
         except Exception as e:
-            logger.error(f"Failed to update document in database: {str(e)}")
+            logger.error("Failed to update document in database: %s", e)
             raise ValidationError(f"Failed to update document: {str(e)}")
 
         return {'message': 'Document updated successfully'}
@@ -354,29 +657,35 @@ class DocumentService:
         Raises:
             NotFoundError: If document doesn't exist
         """
-        logger.debug(f"Deleting document: {filename}")
+        logger.debug("Deleting document: %s", filename)
         document = self.db.get_document_by_filename(filename)
 
         if not document:
-            logger.warning(f"Document not found: {filename}")
+            logger.warning("Document not found: %s", filename)
             raise NotFoundError(f"Document '{filename}' not found")
 
         document_id = document['id']
 
-        # Delete from RAG
-        try:
-            self.rag.delete_document(filename)
-            logger.debug(f"Deleted RAG chunks for {filename}")
-        except Exception as e:
-            logger.warning(f"Failed to delete RAG chunks: {str(e)}")
+        # The RAG and database deletes don't depend on each other, so run them
+        # side by side (the database delete cascades to chat history)
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            rag_future = executor.submit(self.rag.delete_document, filename)
+            db_future = executor.submit(self.db.delete_document, document_id)
 
-        # Delete from database (cascades to chat history)
-        try:
-            self.db.delete_document(document_id)
-            logger.debug(f"Deleted document {filename} from database")
-        except Exception as e:
-            logger.error(f"Failed to delete from database: {str(e)}")
+        if rag_future.exception() is None:
+            logger.debug("Deleted RAG chunks for %s", filename)
+        else:
+            logger.warning("Failed to delete RAG chunks: %s", rag_future.exception())
+
+        if db_future.exception() is not None:
+            e = db_future.exception()
+            logger.error("Failed to delete from database: %s", e)
             raise ValidationError(f"Failed to delete document: {str(e)}")
+        logger.debug("Deleted document %s from database", filename)
+
+        if rag_future.exception() is not None:
+            # The cleanup worker retries until the chunks are gone
+            self._queue_chunk_cleanup(filename)
 
         return {
             'message': 'Document deleted successfully',
@@ -385,13 +694,83 @@ class DocumentService:
         }
 
 
-# Singleton instance
-_document_service = None
-
-
+# Fixed pieces of the search results document; each ends with the newline
+# that separates it from the next piece
+_GENERATED_HEADING = "\n## Generated Answer\n\n"
+_SOURCES_HEADING = "\n### Sources\n\n"
+_FOOTER_RULE = "\n---\n\n"
+
+
+def _format_search_results(query: str, search_results: list, service_name: str, timestamp: str) -> str:
+    """Render web search results as the markdown content of a new document."""
+    buffer = io.StringIO()
+    write = buffer.write
+    write(f"# Search Results for: {query}\n\n")
+
+    for result in search_results:
+        # One unpack instead of repeated attribute lookups per branch
+        title, content, url, is_generated, citations, metadata = (
+            result.title, result.content, result.url, result.is_generated, result.citations, result.metadata
+        )
+        # Handle generated content
+        if is_generated:
+            write(_GENERATED_HEADING)
+            write(content)
+            write("\n")
+
+            # Add citations if available
+            if citations:
+                write(_SOURCES_HEADING)
+                for j, citation in enumerate(citations, 1):
+                    write(f"{j}. {citation}\n")
+        # Handle citation links
+        elif metadata.get('is_citation'):
+            write(f"\n### {title}\n\n")
+            write(f"Source URL: {url}\n\n")
+        # Regular search results
+        else:
+            write(f"\n## {title}\n")
+            if url:
+                write(f"URL: {url}\n")
+            write(f"\n{content}\n\n")
+
+    write(_FOOTER_RULE)
+    write(f"*Document created from web search using {service_name}*\n\n")
+    write(f"*Query: {query}*\n\n")
+    write(f"*Generated on: {timestamp}*")
+    return buffer.getvalue()
+
+
+def _read_text(file: FileStorage) -> str:
+    """
+    Decode an upload as UTF-8 while reading it.
+
+    TextIOWrapper decodes the stream chunk by chunk, so the whole upload is
+    never held as bytes and str at the same time.
+
+    Raises:
+        UnicodeDecodeError: If the file is not valid UTF-8
+    """
+    reader = io.TextIOWrapper(file.stream, encoding='utf-8', errors='strict', newline='')
+    try:
+        return reader.read()
+    finally:
+        # Hand the stream back open; werkzeug closes it with the request
+        reader.detach()
+
+
+# Thread-safe singleton: one instance means one indexing worker in async mode
+_document_service: Optional[DocumentService] = None
+_document_service_lock = threading.Lock()
+
+
+@cache
 def get_document_service() -> DocumentService:
     """Get or create the singleton document service instance."""
     global _document_service
-    if _document_service is None:
-        _document_service = DocumentService()
-    return _document_service
+    # functools.cache skips this once the instance exists; the lock covers
+    # concurrent first requests, which can all miss the cache
+    with _document_service_lock:
+        if _document_service is None:
+            _document_service = DocumentService()
+        return _document_service
@@ -0,0 +1,51 @@
+"""Background queue for RAG indexing of saved documents."""
+import logging
+import queue
+import threading
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class IndexingQueue:
+    """
+    FIFO of document IDs waiting to be indexed, drained by one daemon thread.
+
+    A single worker keeps jobs for the same document in submission order, so
+    the last job always indexes the latest saved content.
+    """
+
+    def __init__(self, index_document: Callable[[str], None]):
+        """
+        Start the worker thread.
+
+        Args:
+            index_document: Called with each submitted document ID; it loads the
+                saved content and indexes it. Exceptions are logged, not raised.
+        """
+        self._index_document = index_document
+        self._jobs = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='indexing-worker', daemon=True)
+        self._worker.start()
+
+    def submit(self, document_id: str):
+        """Queue a document for indexing."""
+        self._jobs.put(document_id)
+
+    def pending(self) -> int:
+        """Number of queued jobs not yet finished (approximate)."""
+        return self._jobs.unfinished_tasks
+
+    def join(self):
+        """Block until every queued job has finished."""
+        self._jobs.join()
+
+    def _run(self):
+        while True:
+            document_id = self._jobs.get()
+            try:
+                self._index_document(document_id)
+            except Exception:
+                logger.exception("Background indexing failed for document %s", document_id)
+            finally:
+                self._jobs.task_done()
@@ -1,5 +1,7 @@
 """Query service for handling RAG query operations."""
 import logging
+import threading
+from functools import cache
 from typing import Dict, Any
 
 from app.database import get_db_service
@@ -31,36 +33,31 @@ class QueryService:
         Raises:
             NotFoundError: If document doesn't exist
         """
-        logger.debug(f"Processing query for document {document_id}: {question[:50]}...")
+        logger.debug("Processing query for document %s: %.50s...", document_id, question)
 
         # Verify document exists
         doc = self.db.get_document_by_id(document_id)
         if not doc:
-            logger.warning(f"Document not found: {document_id}")
+            logger.warning("Document not found: %s", document_id)
             raise NotFoundError(f"Document with ID {document_id} not found")
 
         # Query RAG
         try:
             result = self.rag.query(question, top_k)
-            logger.info(f"RAG query successful for document {document_id}")
         except Exception as e:
-            logger.error(f"RAG query failed: {str(e)}")
+            logger.error("RAG query failed: %s", e)
             raise
 
         # Save to chat history (batch both messages in transaction)
         chat_saved = True
         try:
-            answer = result.get('answer', '')
-            self.db.add_chat_message(document_id, 'human', question)
-            self.db.add_chat_message(
-                document_id,
-                'ai',
-                answer,
-                result.get('sources', [])
-            )
-            logger.debug(f"Saved query to chat history for document {document_id}")
+            self.db.add_chat_messages([
+                (document_id, 'human', question, None),
+                (document_id, 'ai', result.get('answer', ''), result.get('sources', []))
+            ])
+            logger.debug("Saved query to chat history for document %s", document_id)
         except Exception as e:
-            logger.error(f"Failed to save to chat history: {str(e)}")
+            logger.error("Failed to save to chat history: %s", e)
             chat_saved = False
 
         # Include persistence status in response
@@ -68,13 +65,16 @@ class QueryService:
         return result
 
 
-# Singleton instance
+# Thread-safe singleton; functools.cache returns it without re-entering the function
 _query_service = None
+_query_service_lock = threading.Lock()
 
 
+@cache
 def get_query_service() -> QueryService:
     """Get or create the singleton query service instance."""
     global _query_service
-    if _query_service is None:
-        _query_service = QueryService()
-    return _query_service
+    with _query_service_lock:
+        if _query_service is None:
+            _query_service = QueryService()
+        return _query_service
@@ -0,0 +1,98 @@
+"""Background worker draining the RAG cleanup outbox (pending_rag_deletes)."""
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class RagCleanupWorker:
+    """
+    Delete RAG chunks queued in the database after failed document saves.
+
+    A failed save records the filename in pending_rag_deletes and returns
+    straight away; this daemon thread deletes the chunks later. Rows are
+    removed only once their delete succeeded, so a RAG outage delays cleanup
+    instead of leaking chunks. A filename that has since been saved again is
+    dropped without deleting: its chunks now belong to that document.
+
+    A sync upload writes a filename's chunks before its row exists, so the
+    row check alone would let a drain delete them. Uploads hold ``indexing``
+    for the filename until the row is saved; the worker leaves those
+    filenames queued for a later pass, and uploads wait for a delete of their
+    filename that is already running.
+    """
+
+    def __init__(self, db, delete_chunks: Callable[[str], None], interval: float = 30.0):
+        """
+        Start the worker thread; it drains once at startup, then every ``interval`` seconds.
+
+        Args:
+            db: Database service holding the outbox table
+            delete_chunks: Deletes one filename's RAG chunks; raises on failure
+            interval: Seconds between polls when not woken by ``notify``
+        """
+        self._db = db
+        self._delete_chunks = delete_chunks
+        self._interval = interval
+        self._wake = threading.Event()
+        self._claims = threading.Condition()
+        # Filename -> uploads currently writing its chunks
+        self._indexing = Counter()
+        # Filenames whose chunks the worker is deleting right now
+        self._deleting = set()
+        self._worker = threading.Thread(target=self._run, name='rag-cleanup', daemon=True)
+        self._worker.start()
+
+    def notify(self):
+        """Drain the outbox now instead of at the next poll."""
+        self._wake.set()
+
+    @contextmanager
+    def indexing(self, filename: str) -> Iterator[None]:
+        """Keep the worker off ``filename``'s chunks while they are written and saved."""
+        with self._claims:
+            while filename in self._deleting:
+                self._claims.wait()
+            self._indexing[filename] += 1
+        try:
+            yield
+        finally:
+            with self._claims:
+                self._indexing[filename] -= 1
+                if not self._indexing[filename]:
+                    del self._indexing[filename]
+
+    def drain(self) -> int:
+        """Process the oldest queued deletions once; returns the number completed."""
+        done = []
+        for row_id, filename in self._db.get_pending_rag_deletes():
+            with self._claims:
+                if filename in self._indexing:
+                    # Being indexed again; decided on a later pass, once it is saved or not
+                    continue
+                self._deleting.add(filename)
+            try:
+                if self._db.get_document_by_filename(filename) is None:
+                    self._delete_chunks(filename)
+            except Exception as e:
+                logger.warning("RAG cleanup for %s failed, will retry: %s", filename, e)
+                continue
+            finally:
+                with self._claims:
+                    self._deleting.discard(filename)
+                    self._claims.notify_all()
+            done.append(row_id)
+        self._db.remove_pending_rag_deletes(done)
+        return len(done)
+
+    def _run(self):
+        while True:
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("RAG cleanup pass failed")
+            self._wake.wait(self._interval)
+            self._wake.clear()
@@ -2,8 +2,11 @@
 
 import logging
 import threading
-from typing import List, Dict, Any
+from dataclasses import replace
+from functools import cache
+from typing import List, Dict, Any, Tuple
 
+import numpy as np
 from haystack import Pipeline, Document
 from haystack.components.builders import PromptBuilder
 from haystack.components.generators import OpenAIGenerator
@@ -17,6 +20,8 @@ from .chromadb_manager import ChromaDBManager
 from .text_chunker import TextChunker
 from .query_expander import QueryExpander
 from .embeddings_manager import EmbeddingsManager
+from .embed_batcher import EmbedBatcher
+from .embedding_cache import EmbeddingCache, QueryEmbeddingCache
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +31,7 @@ class RAGService:
         # Initialize ChromaDB document store with retry logic
         self.chromadb_manager = ChromaDBManager()
         self.document_store = self.chromadb_manager.initialize_with_retry()
+        self.distance_function = self.chromadb_manager.distance_function
 
         # Initialize utilities
         self.text_chunker = TextChunker()
@@ -39,9 +45,14 @@ class RAGService:
             model=Config.EMBEDDING_MODEL
         )
 
+        # ~800-char chunks, so a full batch stays far below the per-request token cap;
+        # the embedder retries rate-limited requests itself instead of failing the upload
         self.doc_embedder = OpenAIDocumentEmbedder(
             api_key=Secret.from_token(Config.OPENAI_API_KEY),
-            model=Config.EMBEDDING_MODEL
+            model=Config.EMBEDDING_MODEL,
+            batch_size=Config.EMBED_BATCH_SIZE,
+            max_retries=3,
+            progress_bar=False
         )
 
         # Initialize generator
@@ -51,16 +62,28 @@ class RAGService:
             model=Config.MODEL_NAME
         )
 
+        # Chunks from concurrent index_document calls share embedding API batches
+        # and a run can fill one API request per embedding thread
+        self.embed_batcher = EmbedBatcher(
+            self.doc_embedder,
+            max_batch=Config.EMBED_BATCH_SIZE * Config.EMBED_CONCURRENCY,
+            concurrency=Config.EMBED_CONCURRENCY
+        )
+        # Chunks embedded before (by any document or version) skip the embedding API
+        self.embedding_cache = (
+            EmbeddingCache(Config.EMBEDDING_CACHE_PATH, Config.EMBEDDING_MODEL)
+            if Config.EMBEDDING_CACHE_PATH else None
+        )
+        # Repeated questions reuse their query embedding
+        self.query_embedding_cache = QueryEmbeddingCache(Config.EMBEDDING_MODEL)
+
         # Setup pipelines
         self._setup_pipelines()
 
     def _setup_pipelines(self):
         """Setup indexing and query pipelines"""
-        # Indexing pipeline
-        self.indexing_pipeline = Pipeline()
-        self.indexing_pipeline.add_component("embedder", self.doc_embedder)
-        self.indexing_pipeline.add_component("writer", DocumentWriter(document_store=self.document_store))
-        self.indexing_pipeline.connect("embedder.documents", "writer.documents")
+        # Indexing: documents are embedded through embed_batcher, then written
+        self.document_writer = DocumentWriter(document_store=self.document_store)
 
         # Query pipeline
         template = """Given the following context, answer the question.
@@ -84,13 +107,13 @@ Answer:"""
         prompt_builder = PromptBuilder(template=template, required_variables=["documents", "question"])
         retriever = ChromaEmbeddingRetriever(document_store=self.document_store)
 
+        # The query embedding is computed (or taken from the cache) before the
+        # pipeline runs and fed to the retriever directly
         self.query_pipeline = Pipeline()
-        self.query_pipeline.add_component("text_embedder", self.text_embedder)
         self.query_pipeline.add_component("retriever", retriever)
         self.query_pipeline.add_component("prompt_builder", prompt_builder)
         self.query_pipeline.add_component("llm", self.generator)
 
-        self.query_pipeline.connect("text_embedder.embedding", "retriever.query_embedding")
         self.query_pipeline.connect("retriever.documents", "prompt_builder.documents")
         self.query_pipeline.connect("prompt_builder.prompt", "llm.prompt")
 
@@ -108,41 +131,165 @@ Answer:"""
         Raises:
             Exception: If indexing fails
         """
-        logger.debug(f"Indexing document: {filename}")
+        logger.debug("Indexing document: %s", filename)
 
         try:
-            # Use semantic chunking that preserves related information together
-            chunks = self.text_chunker.split_text_semantically(content)
-            logger.debug(f"Split document into {len(chunks)} chunks")
-
-            # Create Haystack documents
-            documents = [
-                Document(
-                    content=chunk['text'],
-                    meta={
-                        "filename": filename,
-                        "chunk_id": i,
-                        "line_start": chunk['line_start'],
-                        "line_end": chunk['line_end']
-                    }
-                )
-                for i, chunk in enumerate(chunks)
-            ]
-
-            logger.debug(f"Indexing {len(documents)} document chunks for {filename}")
-            # Run indexing pipeline
-            self.indexing_pipeline.run({"embedder": {"documents": documents}})
-
-            # Verify documents were indexed
-            doc_count = self.document_store.count_documents()
-            logger.debug(f"Total documents in store after indexing: {doc_count}")
-            logger.debug(f"Successfully indexed {len(chunks)} chunks for {filename}")
-
-            return len(chunks)
+            documents = self._chunk_documents(filename, content)
+
+            logger.debug("Indexing %d document chunks for %s", len(documents), filename)
+            # Embed (batched with any concurrent uploads) and write to the store
+            self.document_writer.run(documents=self._embed(documents))
+            logger.debug("Successfully indexed %d chunks for %s", len(documents), filename)
+
+            return len(documents)
         except Exception as e:
-            logger.error(f"Error indexing document {filename}: {str(e)}", exc_info=True)
+            logger.error("Error indexing document %s: %s", filename, e, exc_info=True)
             raise
 
+    def index_document_incremental(self, filename: str, content: str) -> Tuple[int, int, int]:
+        """
+        Reindex a document, embedding only chunks whose text is new.
+
+        The new content is chunked as in ``index_document`` and matched by
+        chunk text against the chunks already stored for ``filename``. Matched
+        chunks reuse their stored embedding; a chunk whose text and position
+        metadata are both unchanged has the same ID and is left untouched in
+        the store. Only unmatched chunks are embedded, and only stored chunks
+        that are no longer part of the document are deleted.
+
+        Args:
+            filename: Name of the document
+            content: New document content
+
+        Returns:
+            Tuple of (chunks embedded, stored chunks deleted, chunks reused); the
+            new chunk count is embedded + reused
+
+        Raises:
+            Exception: If indexing fails
+        """
+        logger.debug("Incrementally reindexing document: %s", filename)
+
+        try:
+            documents = self._chunk_documents(filename, content)
+            stored = self.document_store.filter_documents(
+                filters={"field": "filename", "operator": "==", "value": filename}
+            )
+
+            # Stored chunks by text; duplicate paragraphs are matched one to one
+            stored_by_text: Dict[str, List[Document]] = {}
+            for doc in stored:
+                stored_by_text.setdefault(doc.content, []).append(doc)
+
+            reused, to_embed = [], []
+            for doc in documents:
+                matches = stored_by_text.get(doc.content)
+                if matches and matches[-1].embedding is not None:
+                    # A copy rather than setting the attribute: haystack warns when a
+                    # Document is mutated. replace() keeps the ID, it isn't recomputed
+                    reused.append(replace(doc, embedding=matches.pop().embedding))
+                else:
+                    to_embed.append(doc)
+            embedded = self._embed(to_embed)
+
+            # Chunks whose ID is in both sets are already stored as they should be
+            stored_ids = {doc.id for doc in stored}
+            new_ids = {doc.id for doc in documents}
+            stale_ids = [doc_id for doc_id in stored_ids if doc_id not in new_ids]
+            if stale_ids:
+                self.document_store.delete_documents(stale_ids)
+            to_write = [doc for doc in reused + embedded if doc.id not in stored_ids]
+            if to_write:
+                self.document_writer.run(documents=to_write)
+
+            removed = len(stale_ids)
+            logger.debug("Reindexed %s: %d chunks embedded, %d removed, %d reused",
+                         filename, len(to_embed), removed, len(reused))
+            return len(to_embed), removed, len(reused)
+        except Exception as e:
+            logger.error("Error reindexing document %s: %s", filename, e, exc_info=True)
+            raise
+
+    def copy_document_chunks(self, source_filename: str, filename: str) -> int:
+        """
+        Index ``filename`` with copies of ``source_filename``'s chunks and embeddings.
+
+        For a document whose content is identical to one already indexed: the
+        stored chunks are written again under the new filename, without
+        calling the embedder.
+
+        Returns:
+            Number of chunks copied (0 if the source has no embedded chunks)
+
+        Raises:
+            Exception: If reading or writing the store fails
+        """
+        stored = self.document_store.filter_documents(
+            filters={"field": "filename", "operator": "==", "value": source_filename}
+        )
+        copies = []
+        for doc in stored:
+            if doc.embedding is None:
+                continue
+            # Haystack hashes the meta's repr and any vector into the ID. Built in
+            # _chunk_meta's key order (Chroma returns keys sorted) and without the
+            # vector, the copy gets the ID index_document gives it under the new name
+            meta = doc.meta
+            copies.append(replace(
+                Document(content=doc.content, meta=_chunk_meta(
+                    filename, meta['chunk_id'], meta['line_start'], meta['line_end']
+                )),
+                embedding=doc.embedding
+            ))
+
+        if copies:
+            self.document_writer.run(documents=copies)
+        logger.debug("Copied %d chunks from %s to %s", len(copies), source_filename, filename)
+        return len(copies)
+
+    def _embed_query(self, text: str) -> List[float]:
+        """Embed a query, reusing the embedding of an identical earlier query."""
+        embedding = self.query_embedding_cache.get(text)
+        if embedding is None:
+            embedding = self.text_embedder.run(text=text)["embedding"]
+            self.query_embedding_cache.put(text, embedding)
+        else:
+            logger.debug("Query embedding cache hit")
+        return embedding
+
+    def _embed(self, documents: List[Document]) -> List[Document]:
+        """Embed documents, taking cached vectors where there are any; keeps their order."""
+        if self.embedding_cache is None or not documents:
+            return self.embed_batcher.embed(documents)
+
+        try:
+            documents, misses = self.embedding_cache.fill(documents)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed, embedding all chunks: %s", e)
+            return self.embed_batcher.embed(documents)
+        if not misses:
+            return documents
+
+        # The embedder returns new Document objects; put them back in place of the misses
+        embedded = self.embed_batcher.embed(misses)
+        try:
+            self.embedding_cache.store(embedded)
+        except Exception as e:
+            logger.warning("Failed to cache %d embeddings: %s", len(embedded), e)
+        replacements = dict(zip(map(id, misses), embedded))
+        return [replacements.get(id(doc), doc) for doc in documents]
+
+    def _chunk_documents(self, filename: str, content: str) -> List[Document]:
+        """Split content into Haystack documents, one per semantic chunk."""
+        # Use semantic chunking that preserves related information together
+        chunks = self.text_chunker.split_text_semantically(content)
+        logger.debug("Split document into %d chunks", len(chunks))
+
+        return [
+            Document(content=chunk['text'], meta=_chunk_meta(filename, i, chunk['line_start'], chunk['line_end']))
+            for i, chunk in enumerate(chunks)
+        ]
+
     def query(self, question: str, top_k: int = 5) -> Dict[str, Any]:
         """
         Query the RAG system.
@@ -157,96 +304,60 @@ Answer:"""
         Raises:
             Exception: If query fails
         """
-        logger.debug(f"Processing query: {question[:100]}...")
+        logger.debug("Processing query: %.100s...", question)
 
         try:
             # Expand query for temporal work queries
             expanded_question = self.query_expander.expand_temporal_query(question)
             if expanded_question != question:
-                logger.debug(f"Using expanded query: {expanded_question[:100]}...")
-
-            # Check document count before querying
-            doc_count = self.document_store.count_documents()
+                logger.debug("Using expanded query: %.100s...", expanded_question)
 
             # Log query details for debugging
-            logger.debug(f"Query details - Original: '{question}', Expanded: '{expanded_question}', Top_k: {top_k}")
+            logger.debug("Query details - Original: '%s', Expanded: '%s', Top_k: %s", question, expanded_question, top_k)
             
             result = self.query_pipeline.run({
-                "text_embedder": {"text": expanded_question},
-                "retriever": {"top_k": top_k},
+                "retriever": {"query_embedding": self._embed_query(expanded_question), "top_k": top_k},
                 "prompt_builder": {"question": question}
-            }, include_outputs_from={"text_embedder", "retriever", "prompt_builder", "llm"})
+            }, include_outputs_from={"retriever", "llm"})
 
             # Get documents from the retriever output
             documents = result.get("retriever", {}).get("documents", [])
-            logger.debug(f"Retrieved {len(documents)} relevant chunks")
+            logger.debug("Retrieved %d relevant chunks", len(documents))
             
             # Log retrieved documents (debug level)
-            for i, doc in enumerate(documents, 1):
-                logger.debug(f"Document {i}: {doc.content[:100]}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, doc in enumerate(documents, 1):
+                    logger.debug("Document %s: %.100s...", i, doc.content)
 
             # Log retrieval diagnostics
             if len(documents) == 0:
                 logger.warning("No documents retrieved - possible retrieval issue")
             elif len(documents) < top_k:
-                logger.warning(f"Only retrieved {len(documents)} documents out of requested {top_k} - may indicate limited relevant content")
+                logger.warning("Only retrieved %d documents out of requested %s - may indicate limited relevant content", len(documents), top_k)
             
-            # Check for temporal information in retrieved docs
-            has_temporal_info = any(
-                '2012' in doc.content and '2019' in doc.content or
-                'Sep 2012' in doc.content or 'Jun 2019' in doc.content
-                for doc in documents
-            )
-
             # Get answer from LLM
             llm_output = result.get("llm", {})
             answer = llm_output.get("replies", [""])[0] if llm_output else "No response from LLM"
-            logger.debug(f"Generated answer: {answer[:100]}...")
+            logger.debug("Generated answer: %.100s...", answer)
+
+            # Turn retriever distances into relevance scores
+            relevance_scores = _relevance_scores(documents, self.distance_function)
+            if logger.isEnabledFor(logging.DEBUG):
+                for i, (doc, relevance_score) in enumerate(zip(documents, relevance_scores), 1):
+                    logger.debug("Document %s: raw_score=%s, relevance=%.3f", i, doc.score, relevance_score)
 
-            # Extract relevance scores from document metadata
-            # ChromaDB uses L2 distance by default: lower score = higher relevance
-            # We need to invert: normalize distance then flip so higher = more relevant
             sources = []
-            max_score = 1.0
-            min_score = 0.0
-            
-            # First pass: collect all scores to determine min/max for normalization
-            scores = []
-            for doc in documents:
-                score = doc.meta.get('score', None)
-                if score is not None:
-                    scores.append(float(score))
-            
-            # Determine normalization bounds
-            if scores:
-                max_score = max(scores)
-                min_score = min(scores)
-                logger.debug(f"Score range from retriever: {min_score} to {max_score}")
-            
-            # Second pass: build sources with normalized relevance scores
-            for i, doc in enumerate(documents):
-                score = doc.meta.get('score', None)
-                
-                # Normalize score to 0-1 range, then invert (L2: lower distance = higher relevance)
-                if score is not None and max_score != min_score:
-                    # Normalize distance to 0-1
-                    normalized_distance = (float(score) - min_score) / (max_score - min_score)
-                    # Invert: lower distance becomes higher relevance score
-                    relevance_score = 1.0 - normalized_distance
-                else:
-                    # Fallback: use positional relevance if no score available
-                    relevance_score = 1.0 - (i / max(len(documents), 1))
-                    normalized_distance = None
-                
-                distance_str = f"{normalized_distance:.3f}" if normalized_distance is not None else "N/A"
-                logger.debug(f"Document {i+1}: raw_score={score}, normalized_distance={distance_str}, relevance={relevance_score:.3f}")
-                
+            for doc, relevance_score in zip(documents, relevance_scores):
+                meta = doc.meta
+                filename = meta.get('filename', 'unknown')
+                line_start = meta.get('line_start', 0)
+                line_end = meta.get('line_end', 0)
                 sources.append({
                     "content": doc.content,
-                    "reference": f"{doc.meta.get('filename', 'unknown')}:{doc.meta.get('line_start', 0)}-{doc.meta.get('line_end', 0)}",
-                    "filename": doc.meta.get('filename', 'unknown'),
-                    "line_start": doc.meta.get('line_start', 0),
-                    "line_end": doc.meta.get('line_end', 0),
+                    "reference": f"{filename}:{line_start}-{line_end}",
+                    "filename": filename,
+                    "line_start": line_start,
+                    "line_end": line_end,
                     "relevance_score": round(relevance_score, 3)
                 })
 
@@ -255,7 +366,7 @@ Answer:"""
                 "sources": sources
             }
         except Exception as e:
-            logger.error(f"Error querying RAG system: {str(e)}", exc_info=True)
+            logger.error("Error querying RAG system: %s", e, exc_info=True)
             raise
 
     # Delegate methods to embeddins_manager
@@ -271,6 +382,10 @@ Answer:"""
         """Delegate to embeddings_manager"""
         return self.embeddings_manager.get_embeddings_paginated(page, per_page, document_id)
 
+    def iter_embeddings_paginated(self, page: int = 1, per_page: int = 50, document_id: str = None):
+        """Delegate to embeddings_manager"""
+        return self.embeddings_manager.iter_embeddings_paginated(page, per_page, document_id)
+
     def delete_embedding_by_id(self, embedding_id: str) -> bool:
         """Delegate to embeddings_manager"""
         return self.embeddings_manager.delete_embedding_by_id(embedding_id)
@@ -284,14 +399,51 @@ Answer:"""
         return self.embeddings_manager.get_documents_with_embeddings_paginated(page, per_page)
 
     def clear_all_embeddings(self) -> bool:
-        """Delegate to embeddings_manager"""
+        """Delegate to embeddings_manager, also emptying the embedding cache"""
+        if self.embedding_cache is not None:
+            self.embedding_cache.clear()
         return self.embeddings_manager.clear_all_embeddings()
 
 
-# Thread-safe singleton implementation
+def _chunk_meta(filename: str, chunk_id: int, line_start: int, line_end: int) -> Dict[str, Any]:
+    """Metadata of one stored chunk; its key order is part of the chunk's ID."""
+    return {"filename": filename, "chunk_id": chunk_id, "line_start": line_start, "line_end": line_end}
+
+
+def _relevance_scores(documents: List[Document], distance_function: str) -> List[float]:
+    """
+    Relevance in [0, 1] for each retrieved document, higher = more relevant.
+
+    The retriever puts Chroma's distance in ``Document.score``. Cosine and inner
+    product distances are ``1 - similarity``; L2 is the squared distance, which
+    for OpenAI's unit-length embeddings is ``2 - 2 * cosine similarity``. Either
+    way the distance converts to cosine similarity in one numpy pass, so scores
+    are comparable across queries. Documents without a score fall back to
+    positional relevance.
+    """
+    count = len(documents)
+    if not count:
+        return []
+    distances = np.fromiter(
+        (np.nan if doc.score is None else doc.score for doc in documents),
+        dtype=np.float64, count=count
+    )
+    if distance_function == 'l2':
+        distances = distances / 2.0
+    similarity = np.clip(1.0 - distances, 0.0, 1.0)
+    unscored = np.isnan(distances)
+    if unscored.any():
+        positional = 1.0 - np.arange(count) / count
+        similarity = np.where(unscored, positional, similarity)
+    return similarity.tolist()
+
+
+# Thread-safe singleton. Once created, functools.cache returns the instance
+# without entering the function; the lock only guards the first calls.
 _rag_service = None
 _rag_service_lock = threading.Lock()
 
+@cache
 def get_rag_service() -> RAGService:
     """
     Get the singleton RAGService instance with thread-safe initialization.
@@ -301,15 +453,8 @@ def get_rag_service() -> RAGService:
     """
     global _rag_service
     
-    # Double-checked locking pattern for thread safety
-    if _rag_service is None:
-        with _rag_service_lock:
-            # Check again inside the lock to prevent race conditions
-            if _rag_service is None:
-                logger.info("Initializing new RAGService singleton")
-                _rag_service = RAGService()
-    else:
-        # Log when returning existing instance
-        logger.debug("Returning existing RAGService instance")
-    
-    return _rag_service
+    with _rag_service_lock:
+        if _rag_service is None:
+            logger.info("Initializing new RAGService singleton")
+            _rag_service = RAGService()
+        return _rag_service
@@ -12,12 +12,37 @@ from app.config import Config
 
 logger = logging.getLogger(__name__)
 
+# Chroma otherwise starts product telemetry (posthog) with every client system.
+# Set through the environment rather than Settings: ChromaDocumentStore builds
+# its client with default Settings, which must equal ours for the two to share
+# one system. An explicit ANONYMIZED_TELEMETRY in the environment still wins.
+os.environ.setdefault('ANONYMIZED_TELEMETRY', 'False')
+
+# Leftovers of a crashed ChromaDB process, safe to delete before reconnecting
+_STALE_FILE_SUFFIXES = ('.lock', '.tmp')
+
 
 class ChromaDBManager:
     """Manages ChromaDB initialization, recovery, and connection validation."""
     
     def __init__(self):
         self.document_store: Optional[ChromaDocumentStore] = None
+        self._client: Optional[chromadb.ClientAPI] = None
+        # Metric of the collection as stored; one created before cosine became
+        # the default keeps L2 until the ChromaDB directory is recreated
+        self.distance_function: str = "cosine"
+
+    def _get_client(self) -> chromadb.ClientAPI:
+        """
+        Return the persistent client, creating it on first use.
+
+        Chroma shares one system (SQLite and HNSW handles) per path between
+        clients, so holding this client keeps those files open across retries;
+        the ChromaDocumentStore built on each attempt attaches to the same system.
+        """
+        if self._client is None:
+            self._client = chromadb.PersistentClient(path=Config.CHROMA_DB_PATH)
+        return self._client
     
     def initialize_with_retry(self, max_retries: int = 3, initial_delay: float = 1.0) -> ChromaDocumentStore:
         """
@@ -37,13 +62,17 @@ class ChromaDBManager:
         
         for attempt in range(max_retries):
             try:
-                # Pre-flight validation - ensure directory exists
-                os.makedirs(Config.CHROMA_DB_PATH, exist_ok=True)
+                # Pre-flight validation - ensure directory exists (one stat when it does)
+                if not os.path.isdir(Config.CHROMA_DB_PATH):
+                    os.makedirs(Config.CHROMA_DB_PATH, exist_ok=True)
                 
-                # Try to initialize ChromaDB
+                # Try to initialize ChromaDB; only the collection wrapper is rebuilt per attempt
+                client = self._get_client()
+                # Cosine suits OpenAI's unit-length embeddings and gives bounded distances
                 document_store = ChromaDocumentStore(
                     collection_name="documents",
-                    persist_path=Config.CHROMA_DB_PATH
+                    persist_path=Config.CHROMA_DB_PATH,
+                    distance_function="cosine"
                 )
                 
                 # Test the connection by checking count
@@ -51,7 +80,8 @@ class ChromaDBManager:
                 logger.info(f"ChromaDB initialized successfully. Current document count: {count}")
                 
                 # Clear any stale connections that might exist
-                self._validate_chroma_connection(document_store)
+                self._validate_chroma_connection(client)
+                self.distance_function = self._collection_distance_function(client)
                 
                 self.document_store = document_store
                 return document_store
@@ -119,16 +149,8 @@ class ChromaDBManager:
         
         # Check database state
         db_exists = os.path.exists(Config.CHROMA_DB_PATH)
-        db_writable = False
-        if db_exists:
-            try:
-                test_file = os.path.join(Config.CHROMA_DB_PATH, '.test_write')
-                with open(test_file, 'w') as f:
-                    f.write('test')
-                os.remove(test_file)
-                db_writable = True
-            except:
-                pass
+        # Permission check only: a write probe costs three syscalls per retry for a log line
+        db_writable = db_exists and os.access(Config.CHROMA_DB_PATH, os.W_OK)
         
         # Log detailed error information
         logger.warning(f"ChromaDB {error_type} error on attempt {attempt}/{max_attempts}")
@@ -147,41 +169,53 @@ class ChromaDBManager:
             logger.info("  This usually indicates a previous instance left stale state")
             logger.info("  Suggestion: Cleanup of lock files or database recreation may be needed")
     
-    def _validate_chroma_connection(self, document_store: ChromaDocumentStore) -> None:
+    def _validate_chroma_connection(self, client: chromadb.ClientAPI) -> None:
         """
         Validate ChromaDB connection by performing a simple operation.
         
         Args:
-            document_store: The ChromaDocumentStore to validate
+            client: The client the document store shares its system with
         """
         try:
-            # Simple validation - check if we can access collection info
-            if hasattr(document_store, '_client') and hasattr(document_store, '_collection_name'):
-                client = document_store._client
-                collection_name = document_store._collection_name or "documents"
-                
-                # Try to get the collection - this validates tenant/connection
-                collection = client.get_collection(collection_name)
-                count = collection.count()
-            else:
-                # Fallback validation
-                count = document_store.count_documents()
+            # Getting the collection validates tenant/connection; initialize_with_retry
+            # has already counted documents, so no second count here
+            client.get_collection("documents")
                 
         except Exception as e:
             logger.warning(f"ChromaDB connection validation warning: {e}")
             # Don't raise here - just log it as this is just validation
     
+    def _collection_distance_function(self, client: chromadb.ClientAPI) -> str:
+        """Return the metric the documents collection was created with (Chroma defaults to l2)."""
+        try:
+            metadata = client.get_collection("documents").metadata or {}
+            return metadata.get("hnsw:space", "l2")
+        except Exception as e:
+            logger.warning(f"Could not read ChromaDB collection metric, assuming cosine: {e}")
+            return "cosine"
+
     def _gentle_chroma_cleanup(self) -> None:
         """
         Perform gentle cleanup of ChromaDB artifacts without data loss.
         """
         try:
-            # Check for lock files that might indicate a previous crash
+            # Check for lock files that might indicate a previous crash. Chroma keeps
+            # them next to chroma.sqlite3 or in a collection's segment directory, so
+            # only those two levels are scanned, not every embedding file in the tree
             lock_files = []
-            for root, dirs, files in os.walk(Config.CHROMA_DB_PATH):
-                for file in files:
-                    if file.endswith('.lock') or file.endswith('.tmp'):
-                        lock_files.append(os.path.join(root, file))
+            with os.scandir(Config.CHROMA_DB_PATH) as entries:
+                segment_dirs = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        segment_dirs.append(entry.path)
+                    elif entry.name.endswith(_STALE_FILE_SUFFIXES):
+                        lock_files.append(entry.path)
+            for segment_dir in segment_dirs:
+                with os.scandir(segment_dir) as entries:
+                    lock_files.extend(
+                        entry.path for entry in entries
+                        if entry.name.endswith(_STALE_FILE_SUFFIXES) and entry.is_file(follow_symlinks=False)
+                    )
             
             if lock_files:
                 logger.info(f"Removing {len(lock_files)} stale ChromaDB lock files")
@@ -198,6 +232,12 @@ class ChromaDBManager:
         """
         Perform aggressive recovery by backing up and recreating the ChromaDB.
         """
+        # The shared system holds the old database files open; drop it so the
+        # next attempt starts a fresh one on the recreated directory
+        if self._client is not None:
+            self._client.clear_system_cache()
+            self._client = None
+
         try:
             if os.path.exists(Config.CHROMA_DB_PATH):
                 # Create timestamped backup
@@ -0,0 +1,109 @@
+"""Micro-batching of document embedding across concurrent indexing calls."""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from haystack import Document
+
+logger = logging.getLogger(__name__)
+
+
+class EmbedBatcher:
+    """
+    Coalesce embedding requests from concurrent callers into shared embedder runs.
+
+    A daemon thread takes the first waiting request, then keeps collecting
+    until ``max_batch`` documents are gathered or ``max_wait`` seconds have
+    passed. It embeds them all in one embedder run and hands each caller back
+    its own documents. With several uploads indexing at once, their chunks
+    share API batches instead of each upload sending its own partial batch.
+
+    A run larger than the embedder's own batch_size is split into slices of
+    that size, embedded concurrently on up to ``concurrency`` threads, since
+    the embedder would otherwise send those API requests one after another.
+    """
+
+    def __init__(self, embedder, max_wait: float = 0.05, max_batch: int = 256, concurrency: int = 4):
+        """
+        Args:
+            embedder: Haystack document embedder (e.g. OpenAIDocumentEmbedder);
+                only the batcher's threads call it
+            max_wait: Seconds to wait for more requests after the first
+            max_batch: Documents per run at which collecting stops early
+            concurrency: Embedder slices run at the same time
+        """
+        self._embedder = embedder
+        self._max_wait = max_wait
+        self._max_batch = max_batch
+        self._slice_size = getattr(embedder, 'batch_size', 32)
+        self._pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='embed')
+        self._requests = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='embed-batcher', daemon=True)
+        self._worker.start()
+
+    def embed(self, documents: List[Document]) -> List[Document]:
+        """
+        Embed ``documents``, blocking until their batch has run.
+
+        Returns:
+            The documents with embeddings, in the order given
+
+        Raises:
+            Exception: Whatever the embedder raised for the shared batch
+        """
+        if not documents:
+            return []
+        future = Future()
+        self._requests.put((documents, future))
+        return future.result()
+
+    def _collect(self) -> list:
+        """Block for one request, then gather more until the batch is full or the window closes."""
+        batch = [self._requests.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self._max_wait
+        while size < self._max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                request = self._requests.get(timeout=timeout)
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _embed_slices(self, documents: List[Document]) -> List[Document]:
+        """Embed ``documents`` one embedder batch per thread, keeping their order."""
+        if len(documents) <= self._slice_size:
+            return self._embed(documents)
+        slices = [documents[i:i + self._slice_size] for i in range(0, len(documents), self._slice_size)]
+        return [document for embedded in self._pool.map(self._embed, slices) for document in embedded]
+
+    def _embed(self, documents: List[Document]) -> List[Document]:
+        return self._embedder.run(documents=documents)['documents']
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            documents = [document for docs, _ in batch for document in docs]
+            if len(batch) > 1:
+                logger.debug("Embedding %d documents from %d callers in one batch", len(documents), len(batch))
+
+            try:
+                embedded = self._embed_slices(documents)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            # The embedder keeps input order, so each caller's slice is contiguous
+            offset = 0
+            for docs, future in batch:
+                future.set_result(embedded[offset:offset + len(docs)])
+                offset += len(docs)
@@ -0,0 +1,133 @@
+"""Caches of embeddings: persistent for document chunks, in memory for queries."""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
+from cachetools import TTLCache
+from haystack import Document
+
+from app.storage import compute_content_hash
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps bound parameters per statement (999 before 3.32)
+_LOOKUP_BATCH = 500
+
+
+class EmbeddingCache:
+    """
+    Local SQLite store of ``hash(model, chunk text) -> embedding``.
+
+    Chunks seen before, under any filename and in any earlier version of a
+    document, get their vector from here instead of the embedding API. Keys
+    include the model name, so changing EMBEDDING_MODEL never serves stale
+    vectors. Vectors are stored as float64 bytes and come back unchanged.
+    """
+
+    def __init__(self, path: str, model: str):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file for the cache
+            model: Embedding model the cached vectors come from
+        """
+        self._model = model
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection shared by the indexing threads, serialized by the lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL) WITHOUT ROWID'
+        )
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        return compute_content_hash(f'{self._model}\0{text}'.encode('utf-8'))
+
+    def fill(self, documents: List[Document]) -> Tuple[List[Document], List[Document]]:
+        """
+        Look up cached embeddings for ``documents``, which are left unchanged.
+
+        Returns:
+            Tuple of (the documents in the order given, each hit replaced by a
+            copy carrying its cached embedding; the misses, which are the same
+            objects as in the first list)
+        """
+        keys = [self._key(doc.content) for doc in documents]
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), _LOOKUP_BATCH):
+                batch = keys[i:i + _LOOKUP_BATCH]
+                found.update(self._conn.execute(
+                    f'SELECT key, vector FROM embeddings WHERE key IN ({",".join("?" * len(batch))})', batch
+                ))
+
+        filled, misses = [], []
+        for doc, key in zip(documents, keys):
+            vector = found.get(key)
+            if vector is None:
+                filled.append(doc)
+                misses.append(doc)
+            else:
+                # A copy: haystack warns when a Document is mutated; the ID is kept
+                filled.append(replace(doc, embedding=array('d', vector).tolist()))
+        if found:
+            logger.debug("Embedding cache hit for %d of %d chunks", len(documents) - len(misses), len(documents))
+        return filled, misses
+
+    def store(self, documents: List[Document]):
+        """Cache the embeddings of freshly embedded ``documents``."""
+        rows = [
+            (self._key(doc.content), array('d', doc.embedding).tobytes())
+            for doc in documents if doc.embedding is not None
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                # A key already present holds the same model's vector for the same text
+                self._conn.executemany('INSERT OR IGNORE INTO embeddings (key, vector) VALUES (?, ?)', rows)
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def clear(self):
+        """Drop every cached embedding."""
+        with self._lock:
+            self._conn.execute('DELETE FROM embeddings')
+
+
+class QueryEmbeddingCache:
+    """
+    In-process TTL cache of query embeddings, keyed by model and query text.
+
+    A repeated question (after query expansion) skips the embedding API call.
+    """
+
+    def __init__(self, model: str, maxsize: int = 1024, ttl: float = 3600.0):
+        self._model = model
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f'{self._model}\0{text}'.encode('utf-8')).hexdigest()
+
+    def get(self, text: str) -> Optional[List[float]]:
+        with self._lock:
+            return self._cache.get(self._key(text))
+
+    def put(self, text: str, embedding: List[float]):
+        with self._lock:
+            self._cache[self._key(text)] = embedding
@@ -1,6 +1,6 @@
 """Embeddings management utilities for RAG system."""
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
 from haystack import Document
 from haystack_integrations.document_stores.chroma import ChromaDocumentStore
@@ -121,6 +121,28 @@ class EmbeddingsManager:
         Returns:
             Dict with embeddings and pagination info
             
+        Raises:
+            Exception: If query fails
+        """
+        pagination, embeddings = self.iter_embeddings_paginated(page, per_page, document_id)
+        return {'embeddings': list(embeddings), **pagination}
+
+    def iter_embeddings_paginated(self, page: int = 1, per_page: int = 50,
+                                  document_id: str = None) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+        """
+        Get one page of embeddings as pagination info plus a lazy row iterator.
+
+        Rows are built as the iterator is consumed, so a caller streaming them
+        out never holds the whole page of row dicts at once.
+
+        Args:
+            page: Page number (1-based)
+            per_page: Number of items per page
+            document_id: Optional filter by document_id
+
+        Returns:
+            Tuple of (pagination dict, iterator of embedding dicts)
+
         Raises:
             Exception: If query fails
         """
@@ -139,7 +161,7 @@ class EmbeddingsManager:
 
                 # Get total count
                 if where_clause:
-                    total = len(collection.get(where=where_clause)['ids'])
+                    total = len(collection.get(where=where_clause, include=[])['ids'])
                 else:
                     total = collection.count()
 
@@ -154,21 +176,12 @@ class EmbeddingsManager:
                     include=['metadatas', 'documents']
                 )
 
-                embeddings = []
-                for i in range(len(results['documents'])):
-                    embeddings.append({
-                        'id': results['ids'][i] if i < len(results['ids']) else f"embed_{i}",
-                        'content': results['documents'][i],
-                        'metadata': results['metadatas'][i] if i < len(results['metadatas']) else {}
-                    })
-
-                return {
-                    'embeddings': embeddings,
-                    'total': total,
-                    'page': page,
-                    'per_page': per_page,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+                embeddings = (
+                    {'id': embedding_id, 'content': content, 'metadata': metadata or {}}
+                    for embedding_id, content, metadata in zip(
+                        results['ids'], results['documents'], results['metadatas']
+                    )
+                )
             else:
                 # Fallback to filter_documents if internals not available
                 filters = None
@@ -181,24 +194,22 @@ class EmbeddingsManager:
                 # Manual pagination fallback
                 start_idx = (page - 1) * per_page
                 end_idx = start_idx + per_page
-                docs_slice = docs[start_idx:end_idx]
 
-                embeddings = [
+                embeddings = (
                     {
                         'id': doc.id,
                         'content': doc.content,
                         'metadata': doc.meta
                     }
-                    for doc in docs_slice
-                ]
+                    for doc in docs[start_idx:end_idx]
+                )
 
-                return {
-                    'embeddings': embeddings,
-                    'total': total,
-                    'page': page,
-                    'per_page': per_page,
-                    'total_pages': (total + per_page - 1) // per_page
-                }
+            return {
+                'total': total,
+                'page': page,
+                'per_page': per_page,
+                'total_pages': (total + per_page - 1) // per_page
+            }, embeddings
                 
         except Exception as e:
             logger.error(f"Error getting paginated embeddings: {str(e)}", exc_info=True)
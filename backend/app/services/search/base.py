@@ -6,6 +6,9 @@ from typing import List, Dict, Any, Optional
 
 class SearchResult:
     """Standardized search result structure."""
+
+    # Fixed attribute set: no per-instance __dict__, and faster attribute reads
+    __slots__ = ('title', 'content', 'url', 'is_generated', 'citations', 'metadata')
     
     def __init__(
         self,
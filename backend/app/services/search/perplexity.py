@@ -1,13 +1,13 @@
 """Perplexity AI search service implementation."""
 
 import logging
-import os
 from typing import List
 import time
 
 import requests
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
+from app.config import Config
 from .base import SearchService, SearchResult
 
 logger = logging.getLogger(__name__)
@@ -17,7 +17,7 @@ class PerplexitySearch(SearchService):
     """Search service using Perplexity API for comprehensive web search with retry logic."""
     
     def __init__(self):
-        self.api_key = os.getenv('PERPLEXITY_API_KEY')
+        self.api_key = Config.PERPLEXITY_API_KEY
         self.base_url = "https://api.perplexity.ai/chat/completions"
         self.model = "sonar-pro"  # Recommended model for search
         self.request_timeout = 30  # 30 second timeout for requests
@@ -1,5 +1,5 @@
 """Storage module for file-based document storage."""
 
-from .document_storage import get_document_storage, DocumentStorage
+from .document_storage import get_document_storage, DocumentStorage, compute_content_hash, CONTENT_HASH_ALGO
 
-__all__ = ['get_document_storage', 'DocumentStorage']
+__all__ = ['get_document_storage', 'DocumentStorage', 'compute_content_hash', 'CONTENT_HASH_ALGO']
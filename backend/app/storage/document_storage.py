@@ -12,8 +12,47 @@ from pathlib import Path
 
 from app.utils.string_utils import truncate_content
 
+try:
+    import zstandard as zstd
+except ImportError:  # zstandard is optional; content is then stored uncompressed
+    zstd = None
+
+try:
+    import blake3
+except ImportError:  # blake3 is optional; hashlib's hardware-accelerated sha256 is used instead
+    blake3 = None
+
 logger = logging.getLogger(__name__)
 
+# Content files at least this large are stored zstd-compressed (when available)
+_COMPRESS_MIN_BYTES = 4096
+_ZSTD_LEVEL = 3
+# Frame magic number, used to detect compressed files regardless of current settings
+_ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Algorithm for new content hashes. Hashes recorded without an algorithm are md5.
+CONTENT_HASH_ALGO = 'blake3' if blake3 is not None else 'sha256'
+LEGACY_CONTENT_HASH_ALGO = 'md5'
+
+
+def compute_content_hash(data: bytes, algo: str = CONTENT_HASH_ALGO) -> Optional[str]:
+    """
+    Hash encoded document content.
+
+    Args:
+        data: UTF-8 encoded content
+        algo: Hash algorithm name ('blake3' or any hashlib algorithm)
+
+    Returns:
+        Hex digest, or None if the algorithm is not available in this environment
+    """
+    if algo == 'blake3':
+        return blake3.blake3(data).hexdigest() if blake3 is not None else None
+    try:
+        return hashlib.new(algo, data).hexdigest()
+    except ValueError:
+        return None
+
 
 class DocumentStorage:
     """Manages file-based storage for document content."""
@@ -107,11 +146,14 @@ class DocumentStorage:
             # Sanitize filename for security
             filename = self._sanitize_filename(filename)
             
-            # Store the content
+            # Store the content, compressing large documents
             file_path = self._get_file_path(filename, create=True)
+            raw = content.encode('utf-8')
+            compressed = zstd is not None and len(raw) >= _COMPRESS_MIN_BYTES
+            data = zstd.compress(raw, _ZSTD_LEVEL) if compressed else raw
             
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            with open(file_path, 'wb') as f:
+                f.write(data)
             
             # Store metadata (including file size and checksum)
             if metadata is None:
@@ -119,8 +161,11 @@ class DocumentStorage:
             
             metadata.update({
                 'stored_at': datetime.now().isoformat(),
-                'file_size': len(content.encode('utf-8')),
-                'content_hash': hashlib.md5(content.encode()).hexdigest(),
+                'file_size': len(raw),
+                'stored_size': len(data),
+                'compression': 'zstd' if compressed else None,
+                'content_hash': compute_content_hash(raw),
+                'content_hash_algo': CONTENT_HASH_ALGO,
                 'file_path': str(file_path.relative_to(self.storage_path))
             })
             
@@ -154,19 +199,29 @@ class DocumentStorage:
                 logger.debug(f"Document file not found: {filename}")
                 return None
             
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            with open(file_path, 'rb') as f:
+                data = f.read()
+            
+            if data.startswith(_ZSTD_MAGIC):
+                if zstd is None:
+                    logger.error(f"Document {filename} is zstd-compressed but zstandard is not installed")
+                    return None
+                data = zstd.decompress(data)
             
             # Verify integrity if requested and hash is available
             if verify_integrity:
                 metadata = self.load_metadata(filename)
                 if metadata and 'content_hash' in metadata:
                     expected_hash = metadata['content_hash']
-                    actual_hash = hashlib.md5(content.encode()).hexdigest()
-                    if expected_hash != actual_hash:
+                    algo = metadata.get('content_hash_algo') or LEGACY_CONTENT_HASH_ALGO
+                    actual_hash = compute_content_hash(data, algo)
+                    if actual_hash is None:
+                        logger.debug(f"Skipping integrity check for {filename}: {algo} not available")
+                    elif expected_hash != actual_hash:
                         logger.error(f"Content hash mismatch for {filename}: expected {expected_hash}, got {actual_hash}")
                         return None
             
+            content = data.decode('utf-8')
             logger.debug(f"Document loaded: {filename} ({len(content)} bytes)")
             return content
             
@@ -0,0 +1,96 @@
+"""Conditional and briefly cached JSON responses for endpoints polled by the UI."""
+import hashlib
+import threading
+from functools import wraps
+
+from cachetools import TTLCache
+from flask import Response, g, jsonify, make_response, request
+
+# Always revalidate: a 304 is cheap, and a max-age would hide fresh uploads
+_CACHE_CONTROL = 'private, no-cache'
+
+# Finished 200 responses of @cached_response views, keyed by (path, query string)
+_RESPONSE_CACHE_TTL = 2.0
+_response_cache = TTLCache(maxsize=256, ttl=_RESPONSE_CACHE_TTL)
+_response_cache_lock = threading.Lock()
+
+# Methods that can change what the cached views return
+_WRITE_METHODS = frozenset({'POST', 'PUT', 'PATCH', 'DELETE'})
+
+
+def conditional_json(payload) -> Response:
+    """jsonify ``payload`` with a weak content ETag, or return 304 if the client has it.
+
+    flask-compress appends ``:<encoding>`` to ETags of compressed responses, so
+    that suffix is ignored when matching ``If-None-Match``.
+    """
+    response = jsonify(payload)
+    etag = hashlib.blake2b(response.get_data(), digest_size=16).hexdigest()
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = _CACHE_CONTROL
+
+    # A @cached_response view stores the full body and revalidates on each hit
+    if g.get('filling_response_cache'):
+        return response
+    return _revalidate(response)
+
+
+def _revalidate(response: Response) -> Response:
+    """Swap ``response`` for a bodiless 304 when the client already holds its ETag."""
+    etag, _ = response.get_etag()
+    if etag is None:
+        return response
+
+    client_etags = request.if_none_match
+    if client_etags.star_tag or any(
+        tag.split(':', 1)[0] == etag for tag in client_etags.as_set(include_weak=True)
+    ):
+        not_modified = Response(status=304)
+        not_modified.set_etag(etag, weak=True)
+        not_modified.headers['Cache-Control'] = _CACHE_CONTROL
+        return not_modified
+    return response
+
+
+def cached_response(view):
+    """Serve repeat GETs of ``view`` from a process-wide cache for a couple of seconds.
+
+    Only 200 responses are kept, as body bytes plus headers, so a hit skips the
+    database and JSON encoding entirely. ETags are still checked per request.
+    Entries expire on their own and are all dropped after any write request
+    (see ``clear_response_cache_after_write``).
+    """
+    @wraps(view)
+    def decorated_function(*args, **kwargs):
+        key = (request.path, request.query_string)
+        with _response_cache_lock:
+            cached = _response_cache.get(key)
+
+        if cached is None:
+            g.filling_response_cache = True
+            try:
+                response = make_response(view(*args, **kwargs))
+            finally:
+                g.filling_response_cache = False
+            if response.status_code != 200 or response.is_streamed:
+                return response
+            cached = (response.get_data(), list(response.headers))
+            with _response_cache_lock:
+                _response_cache[key] = cached
+
+        body, headers = cached
+        return _revalidate(Response(body, status=200, headers=headers))
+    return decorated_function
+
+
+def clear_response_cache():
+    """Drop every cached response."""
+    with _response_cache_lock:
+        _response_cache.clear()
+
+
+def clear_response_cache_after_write(response: Response) -> Response:
+    """after_request hook: a write may have changed any cached answer, so drop them all."""
+    if request.method in _WRITE_METHODS:
+        clear_response_cache()
+    return response
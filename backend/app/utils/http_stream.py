@@ -0,0 +1,37 @@
+"""Streamed responses that compress as they go."""
+from typing import Iterable
+
+from flask import Response, current_app, request
+
+try:
+    import zstandard as zstd
+except ImportError:  # zstandard is optional; streams are then sent uncompressed
+    zstd = None
+
+
+def streaming_response(chunks: Iterable[str], mimetype: str) -> Response:
+    """Stream ``chunks``, zstd-compressing them incrementally when the client accepts it.
+
+    flask-compress would buffer a streamed body to compress it in one piece,
+    so these responses set Content-Encoding themselves (which flask-compress
+    leaves alone) and stay streamed end to end.
+    """
+    if (
+        zstd is None
+        or 'zstd' not in current_app.config['COMPRESS_ALGORITHM']
+        or not request.accept_encodings['zstd']
+    ):
+        return Response((chunk.encode() for chunk in chunks), mimetype=mimetype)
+
+    compressor = zstd.ZstdCompressor(level=current_app.config['COMPRESS_ZSTD_LEVEL']).compressobj()
+
+    def generate():
+        for chunk in chunks:
+            # Empty until the compressor has a block's worth of output
+            if data := compressor.compress(chunk.encode()):
+                yield data
+        yield compressor.flush()
+
+    response = Response(generate(), mimetype=mimetype)
+    response.headers['Content-Encoding'] = 'zstd'
+    return response
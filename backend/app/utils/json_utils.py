@@ -0,0 +1,28 @@
+"""JSON encoding helpers backed by orjson when it is installed."""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+
+if orjson is not None:
+    def dumps(value: Any) -> str:
+        """Serialize ``value`` to a compact JSON string (numpy values included)."""
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(data: Any) -> Any:
+        """Parse JSON from ``str`` or ``bytes``."""
+        return orjson.loads(data)
+else:
+    def dumps(value: Any) -> str:
+        """Serialize ``value`` to a compact JSON string."""
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+
+    def loads(data: Any) -> Any:
+        """Parse JSON from ``str`` or ``bytes``."""
+        return json.loads(data)
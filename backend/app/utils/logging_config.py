@@ -4,6 +4,8 @@ import logging
 import os
 import sys
 
+from app.config import get_env
+
 # Define log levels
 LOG_LEVELS = {
     'CRITICAL': logging.CRITICAL,
@@ -13,37 +15,58 @@ LOG_LEVELS = {
     'DEBUG': logging.DEBUG
 }
 
+# Shared by the console and file handlers
+_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Configuration applied by the last setup_logging() call, used to make repeat calls no-ops
+_active_config = None
+
 
 def setup_logging(config=None):
     """
     Setup simplified logging configuration.
     
+    Safe to call more than once: a repeat call with the same configuration
+    keeps the existing handlers instead of stacking duplicates.
+    
     Args:
         config: Optional configuration dictionary
     """
+    global _active_config
+    
     if config is None:
         config = {
-            'level': os.getenv('LOG_LEVEL', 'INFO'),
-            'file_path': os.getenv('LOG_FILE', './logs/app.log')
+            'level': get_env('LOG_LEVEL', 'INFO'),
+            'file_path': get_env('LOG_FILE', './logs/app.log')
         }
     
+    # Already configured this way; keep the current handler chain
+    root_logger = logging.getLogger()
+    if config == _active_config and root_logger.handlers:
+        return
+    
     # Get log level
     log_level = LOG_LEVELS.get(config['level'].upper(), logging.INFO)
     
-    # Get root logger
-    root_logger = logging.getLogger()
     root_logger.setLevel(log_level)
     
-    # Clear existing handlers
-    root_logger.handlers.clear()
+    # The format uses none of the thread/process/source-location fields, so skip
+    # collecting them on every record (findCaller's stack walk is the costly part)
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+    logging._srcfile = None
+    
+    # Remove and close existing handlers so file handles are not leaked
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+        handler.close()
     
     # Simple console handler with basic formatting
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setLevel(log_level)
-    console_formatter = logging.Formatter(
-        fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    console_formatter = logging.Formatter(fmt=_LOG_FORMAT, datefmt=_DATE_FORMAT)
     console_handler.setFormatter(console_formatter)
     root_logger.addHandler(console_handler)
     
@@ -76,7 +99,8 @@ def setup_logging(config=None):
     
     # Log initialization
     logger = logging.getLogger(__name__)
-    logger.info(f"Logging configured - Level: {config['level']}")
+    _active_config = dict(config)
+    logger.info("Logging configured - Level: %s", config['level'])
 
 
 def get_logger(name: str) -> logging.Logger:
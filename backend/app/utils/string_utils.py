@@ -1,4 +1,50 @@
 """String utilities for content truncation and processing."""
+from typing import Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; document stats then use str.split()/splitlines()
+    np = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; large documents then use the numpy array scans
+    njit = None
+
+# Below this size the plain str methods are cheaper than setting up array scans
+_VECTOR_STATS_MIN_LENGTH = 4096
+
+if np is not None:
+    # ASCII bytes that str.split() treats as whitespace and that str.splitlines() breaks on
+    _IS_WHITESPACE = np.zeros(256, dtype=bool)
+    _IS_WHITESPACE[list(b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f')] = True
+    _IS_LINE_BREAK = np.zeros(256, dtype=bool)
+    _IS_LINE_BREAK[list(b'\n\r\x0b\x0c\x1c\x1d\x1e')] = True
+
+
+def _scan_words_and_lines(data, is_whitespace, is_line_break):
+    """Count words and lines of non-empty ASCII bytes in one pass; compiled with numba when installed."""
+    words = 0
+    breaks = 0
+    in_word = False
+    prev_cr = False
+    for i in range(data.shape[0]):
+        c = data[i]
+        if is_whitespace[c]:
+            in_word = False
+        elif not in_word:
+            words += 1
+            in_word = True
+        # \r\n is a single break
+        if is_line_break[c] and not (c == 0x0A and prev_cr):
+            breaks += 1
+        prev_cr = c == 0x0D
+    # A final line without a trailing break still counts
+    return words, breaks + (0 if is_line_break[data[data.shape[0] - 1]] else 1)
+
+
+# No intermediate arrays at all, unlike the numpy scans in count_words_and_lines
+_compiled_scan = njit(cache=True, nogil=True)(_scan_words_and_lines) if njit is not None and np is not None else None
 
 
 def truncate_content(content: str, max_length: int = 500, suffix: str = "...") -> str:
@@ -22,3 +68,42 @@ def truncate_content(content: str, max_length: int = 500, suffix: str = "...") -
     if len(content) > max_length:
         return content[:max_length] + suffix
     return content
+
+
+def count_words_and_lines(content: str) -> Tuple[int, int]:
+    """
+    Count words and lines, matching ``len(content.split())`` and ``len(content.splitlines())``.
+
+    Large ASCII content is scanned as a byte array rather than materialising
+    the word and line lists: in one compiled pass when numba is installed,
+    otherwise with numpy. Anything else uses the str methods.
+
+    Args:
+        content: Document text
+
+    Returns:
+        Tuple of (word_count, line_count)
+
+    Example:
+        >>> count_words_and_lines("hello world\\nbye")
+        (3, 2)
+    """
+    if np is None or len(content) < _VECTOR_STATS_MIN_LENGTH or not content.isascii():
+        return len(content.split()), len(content.splitlines())
+
+    data = np.frombuffer(content.encode('ascii'), dtype=np.uint8)
+    if _compiled_scan is not None:
+        word_count, line_count = _compiled_scan(data, _IS_WHITESPACE, _IS_LINE_BREAK)
+        return int(word_count), int(line_count)
+
+    # A word starts at each non-whitespace byte that follows whitespace (or the start)
+    whitespace = _IS_WHITESPACE[data]
+    word_count = int(np.count_nonzero(whitespace[:-1] & ~whitespace[1:])) + (not whitespace[0])
+
+    # Every break ends a line, except that \r\n is one break; a final line
+    # without a trailing break still counts
+    breaks = _IS_LINE_BREAK[data]
+    crlf = np.count_nonzero((data[:-1] == 0x0D) & (data[1:] == 0x0A))
+    line_count = int(np.count_nonzero(breaks) - crlf) + (not breaks[-1])
+
+    return word_count, line_count
@@ -4,6 +4,8 @@ from functools import wraps
 from typing import Dict, List, Any, Optional
 import logging
 
+from .errors import ValidationError as ValidError
+
 logger = logging.getLogger(__name__)
 
 
@@ -15,10 +17,66 @@ class ValidationError(Exception):
         super().__init__(self.message)
 
 
+_REQUEST_DATA_GETTERS = {
+    'json': lambda: request.get_json(silent=True) or {},
+    'form': lambda: request.form.to_dict(),
+    'args': lambda: request.args.to_dict(),
+}
+
+
+def _compile_field_rules(field_name: str, rules: Dict[str, Any]) -> tuple:
+    """
+    Turn one field's rules into the checks and messages used per request.
+
+    Returns:
+        (field_name, required, expected_type, type_message, str_checks,
+        number_checks, choices, choices_message), where each check is a
+        (failed(value) -> bool, message) pair
+    """
+    required = rules.get('required', False)
+    expected_type = rules.get('type')
+    type_message = (
+        f"Field '{field_name}' must be of type {expected_type.__name__}" if expected_type else None
+    )
+
+    # String checks run against the stripped value
+    str_checks = []
+    if 'min_length' in rules:
+        min_length = rules['min_length']
+        str_checks.append((lambda v: len(v) < min_length,
+                           f"Field '{field_name}' must be at least {min_length} characters"))
+    if 'max_length' in rules:
+        max_length = rules['max_length']
+        str_checks.append((lambda v: len(v) > max_length,
+                           f"Field '{field_name}' must be at most {max_length} characters"))
+    if required:
+        str_checks.append((lambda v: not v,
+                           f"Field '{field_name}' cannot be empty or whitespace only"))
+
+    number_checks = []
+    if 'min' in rules:
+        minimum = rules['min']
+        number_checks.append((lambda v: v < minimum, f"Field '{field_name}' must be at least {minimum}"))
+    if 'max' in rules:
+        maximum = rules['max']
+        number_checks.append((lambda v: v > maximum, f"Field '{field_name}' must be at most {maximum}"))
+
+    choices = rules.get('choices')
+    choices_message = (
+        f"Field '{field_name}' must be one of: {', '.join(map(str, choices))}" if choices is not None else None
+    )
+
+    return (field_name, required, expected_type, type_message,
+            tuple(str_checks), tuple(number_checks), choices, choices_message)
+
+
 def validate_request(schema: Dict[str, Dict[str, Any]], source='json'):
     """
     Decorator to validate request data against a schema.
 
+    The schema is compiled into per-field checks when the route is decorated,
+    so a request only runs the checks its fields actually declare.
+
     Args:
         schema: Dictionary defining required fields and their types
             Example: {
@@ -34,63 +92,47 @@ def validate_request(schema: Dict[str, Dict[str, Any]], source='json'):
     Raises:
         ValidationError: If validation fails
     """
+    if source not in _REQUEST_DATA_GETTERS:
+        raise ValueError(f"Invalid source: {source}")
+    get_data = _REQUEST_DATA_GETTERS[source]
+    fields = tuple(_compile_field_rules(name, rules) for name, rules in schema.items())
+
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Get data from appropriate source
-            if source == 'json':
-                data = request.get_json(silent=True) or {}
-            elif source == 'form':
-                data = request.form.to_dict()
-            elif source == 'args':
-                data = request.args.to_dict()
-            else:
-                raise ValueError(f"Invalid source: {source}")
-
+            data = get_data()
             errors = []
 
             # Validate each field in schema
-            for field_name, rules in schema.items():
+            for (field_name, required, expected_type, type_message,
+                 str_checks, number_checks, choices, choices_message) in fields:
                 value = data.get(field_name)
 
-                # Check if required
-                if rules.get('required', False) and not value:
-                    errors.append(f"Field '{field_name}' is required")
-                    continue
-
-                # Skip further validation if optional and not provided
-                if not value and not rules.get('required', False):
+                # Missing or empty: an error if required, otherwise nothing to check
+                if not value:
+                    if required:
+                        errors.append(f"Field '{field_name}' is required")
                     continue
 
                 # Type validation
-                expected_type = rules.get('type')
                 if expected_type and not isinstance(value, expected_type):
-                    errors.append(f"Field '{field_name}' must be of type {expected_type.__name__}")
+                    errors.append(type_message)
                     continue
 
                 # String validations
                 if isinstance(value, str):
                     stripped_value = value.strip()
-                    if 'min_length' in rules and len(stripped_value) < rules['min_length']:
-                        errors.append(f"Field '{field_name}' must be at least {rules['min_length']} characters")
-                    if 'max_length' in rules and len(stripped_value) > rules['max_length']:
-                        errors.append(f"Field '{field_name}' must be at most {rules['max_length']} characters")
-                    if rules.get('required', False) and not stripped_value:
-                        errors.append(f"Field '{field_name}' cannot be empty or whitespace only")
+                    errors.extend(message for failed, message in str_checks if failed(stripped_value))
 
                 # Numeric validations
                 if isinstance(value, (int, float)):
-                    if 'min' in rules and value < rules['min']:
-                        errors.append(f"Field '{field_name}' must be at least {rules['min']}")
-                    if 'max' in rules and value > rules['max']:
-                        errors.append(f"Field '{field_name}' must be at most {rules['max']}")
+                    errors.extend(message for failed, message in number_checks if failed(value))
 
                 # Choices validation
-                if 'choices' in rules and value not in rules['choices']:
-                    errors.append(f"Field '{field_name}' must be one of: {', '.join(map(str, rules['choices']))}")
+                if choices is not None and value not in choices:
+                    errors.append(choices_message)
 
             if errors:
-                from .errors import ValidationError as ValidError
                 raise ValidError("Validation failed", payload={'errors': errors})
 
             return f(*args, **kwargs)
@@ -98,34 +140,35 @@ def validate_request(schema: Dict[str, Dict[str, Any]], source='json'):
     return decorator
 
 
-def validate_file_upload(allowed_extensions: Optional[List[str]] = None):
+def validate_file_upload(allowed_extensions: Optional[List[str]] = None, field: str = 'file',
+                         multiple: bool = False):
     """
     Decorator to validate file uploads.
 
     Args:
         allowed_extensions: List of allowed file extensions (e.g., ['txt', 'md'])
+        field: Form field holding the upload(s)
+        multiple: Accept several files under ``field``; each one is checked
     """
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            if 'file' not in request.files:
-                from .errors import ValidationError as ValidError
+            if field not in request.files:
                 raise ValidError("No file provided")
 
-            file = request.files['file']
-            if file.filename == '':
-                from .errors import ValidationError as ValidError
-                raise ValidError("No file selected")
-
-            # Check extension
-            if allowed_extensions:
-                ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
-                if ext not in allowed_extensions:
-                    from .errors import ValidationError as ValidError
-                    raise ValidError(
-                        f"Invalid file type. Allowed: {', '.join(allowed_extensions)}",
-                        payload={'allowed_extensions': allowed_extensions}
-                    )
+            files = request.files.getlist(field) if multiple else [request.files[field]]
+            for file in files:
+                if file.filename == '':
+                    raise ValidError("No file selected")
+
+                # Check extension
+                if allowed_extensions:
+                    ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
+                    if ext not in allowed_extensions:
+                        raise ValidError(
+                            f"Invalid file type. Allowed: {', '.join(allowed_extensions)}",
+                            payload={'allowed_extensions': allowed_extensions}
+                        )
 
             return f(*args, **kwargs)
         return decorated_function
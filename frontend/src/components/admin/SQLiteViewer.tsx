@@ -192,6 +192,7 @@ export function SQLiteViewer() {
               <div className="text-sm text-muted-foreground">
                 Showing {(currentPage - 1) * tableData.per_page + 1} -{" "}
                 {Math.min(currentPage * tableData.per_page, tableData.total)} of{" "}
+                {tableData.total_is_estimate && "~"}
                 {tableData.total}
               </div>
             </div>
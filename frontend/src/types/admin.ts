@@ -14,9 +14,11 @@ export interface TableData {
   columns: string[];
   data: Array<Record<string, unknown>>;
   total: number;
+  total_is_estimate?: boolean;
   page: number;
   per_page: number;
   total_pages: number;
+  next_cursor?: string | number | null;
 }
 
 export interface ChromaCollection {
@@ -7,6 +7,7 @@ export interface Document {
   chunk_count: number;
   word_count?: number;
   line_count?: number;
+  index_status?: 'indexing' | 'ready' | 'failed';
 }
 
 export interface DocumentData {